@@ -9,23 +9,34 @@ Commands:
     summary                     Show disk usage summary
     largest [--limit N]         Show largest files (default: 20)
     by-type [--limit N]         Show space usage by file type
-    cleanable                   Find potentially cleanable files with reasons
+    cleanable [--jobs N]        Find potentially cleanable files with reasons
     top-folders [--depth N]     Show largest folders at each depth level
     folder <path> [--depth N]   Explore specific folder contents
     search <pattern>            Search files by name pattern
     filter <conditions>         Filter by conditions (see examples)
 
+Options:
+    --cache                     Reuse parsed rows from <csv_path>.cache.pkl across runs
+
 CSV format (from scan_disk.py): path,size,allocated,modified,is_dir,files_count,folders_count
 Paths are POSIX (e.g. /Users/jane/...). Run from the skill directory.
 """
 
 import csv
+import fnmatch
+import heapq
+import io
+import itertools
 import json
+import operator
+import os
+import pickle
 import re
 import sys
 from pathlib import Path
-from collections import defaultdict
-from typing import List, Dict, Any, Tuple
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 
 # macOS cleanable patterns: (regex, category, reason, migration_hint). Use / for path sep.
@@ -82,6 +93,18 @@ CLEANABLE_PATTERNS = [
     (r"\s*-?\s*copy\.(jpg|png|mp4|mov)$", "duplicate", "Possible duplicate (copy)", None),
 ]
 
+# Bump when the parsed entry layout changes so stale --cache files are ignored
+CACHE_VERSION = 1
+
+# Rows per pickled chunk in the --cache file
+CACHE_CHUNK_ROWS = 20000
+
+# Rows per classification task sent to worker processes (cleanable --jobs)
+CLASSIFY_CHUNK_ROWS = 20000
+
+# Columns written by scan_disk.py, in the order iter_csv unpacks them
+CSV_COLUMNS = ("path", "size", "allocated", "modified", "is_dir", "files_count", "folders_count")
+
 SAFETY_LEVELS = {
     "temp": "safe",
     "cache": "safe",
@@ -95,57 +118,197 @@ SAFETY_LEVELS = {
     "duplicate": "check",
 }
 
-# Pre-compile patterns for better performance
+MATCH_CONTAINS, MATCH_SUFFIX, MATCH_REGEX = 0, 1, 2
+
+
+def pattern_literal(pattern: str) -> Optional[str]:
+    """Return the text a regex matches if it has no metacharacters, else None."""
+    chars = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            if i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+                chars.append(pattern[i + 1])
+                i += 2
+                continue
+            return None
+        if c in ".^$*+?{}[]|()":
+            return None
+        chars.append(c)
+        i += 1
+    return "".join(chars)
+
+
+def compile_pattern(pattern: str) -> Tuple[int, Any]:
+    """Pick the cheapest test for a pattern: substring, suffix or regex."""
+    literal = pattern_literal(pattern)
+    if literal is not None:
+        return MATCH_CONTAINS, literal
+    if pattern.endswith("$") and not pattern.endswith("\\$"):
+        literal = pattern_literal(pattern[:-1])
+        if literal is not None:
+            return MATCH_SUFFIX, literal
+    return MATCH_REGEX, re.compile(pattern)
+
+
+# Patterns are matched against lowercased paths
 CLEANABLE_PATTERNS_COMPILED = [
-    (re.compile(pattern), category, reason, hint)
+    (*compile_pattern(pattern.lower()), category, reason, hint)
     for pattern, category, reason, hint in CLEANABLE_PATTERNS
 ]
 
+# All patterns fused into one non-capturing alternation: a path that matches
+# nothing (the common case) is rejected with a single C-level search.
+CLEANABLE_RE = re.compile("|".join(f"(?:{pattern.lower()})" for pattern, _, _, _ in CLEANABLE_PATTERNS))
+
+
+class CacheCorruptError(Exception):
+    """A --cache file failed to load after some of its rows were already yielded."""
+
+
+class CleanableBucket:
+    """Running totals for one cleanable category."""
+
+    __slots__ = ("files", "file_count", "total_size", "reason", "migration_hints", "safety")
+
+    def __init__(self) -> None:
+        self.files: List[Tuple[int, int, str]] = []  # bounded heap of (size, -seq, path)
+        self.file_count = 0
+        self.total_size = 0
+        self.reason = ""
+        self.migration_hints: Set[str] = set()
+        self.safety = "safe"
+
 
 def parse_size(size_str: str) -> int:
+    # Fast path: scan_disk.py writes plain integers (isdecimal, unlike isdigit,
+    # only accepts characters int() can parse)
+    if size_str.isdecimal():
+        return int(size_str)
     try:
         return int(size_str.strip().replace(",", "").replace(" ", "") or 0)
     except (ValueError, TypeError):
         return 0
 
 
+SIZE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
+
+
 def format_size(size_bytes: int) -> str:
     size_bytes = abs(size_bytes)
-    for unit in ["B", "KB", "MB", "GB", "TB"]:
-        if size_bytes < 1024:
-            return f"{size_bytes:.1f} {unit}"
-        size_bytes /= 1024
-    return f"{size_bytes:.1f} PB"
+    # Each unit is 10 more bits, so the unit follows from the bit length
+    k = min((size_bytes.bit_length() - 1) // 10, 5) if size_bytes >= 1024 else 0
+    return f"{size_bytes / (1 << (10 * k)):.1f} {SIZE_UNITS[k]}"
 
 
 def get_path_depth(path: str) -> int:
     """Depth = number of path segments (POSIX)."""
     p = path.strip("/")
-    if not p:
-        return 0
-    return len(p.split("/"))
-
-
-def read_csv(csv_path: str) -> List[Dict[str, Any]]:
-    """Read scan_disk.py CSV. Header: path,size,allocated,modified,is_dir,files_count,folders_count."""
-    files = []
-    with open(csv_path, "r", encoding="utf-8-sig", errors="ignore") as f:
-        reader = csv.DictReader(f)
+    return p.count("/") + 1 if p else 0
+
+
+def push_top(heap: List[Tuple], limit: int, item: Tuple) -> None:
+    """Keep the `limit` largest items seen so far in a bounded min-heap."""
+    if len(heap) < limit:
+        heapq.heappush(heap, item)
+    elif heap and item > heap[0]:
+        heapq.heapreplace(heap, item)
+
+
+def classify_path(path_lower: str) -> Optional[Tuple[str, str, Optional[str]]]:
+    """Return (category, reason, migration_hint) of the first matching pattern."""
+    if not CLEANABLE_RE.search(path_lower):
+        return None
+    # The leftmost match of the alternation is not necessarily the first pattern
+    # in list order, so resolve the winner pattern by pattern.
+    for kind, needle, category, reason, hint in CLEANABLE_PATTERNS_COMPILED:
+        if kind == MATCH_CONTAINS:
+            if needle in path_lower:
+                return category, reason, hint
+        elif kind == MATCH_SUFFIX:
+            if path_lower.endswith(needle):
+                return category, reason, hint
+        elif needle.search(path_lower):
+            return category, reason, hint
+    return None
+
+
+def classify_paths(paths_lower: List[str]) -> List[Optional[Tuple[str, str, Optional[str]]]]:
+    """Worker entry point: classify_path over a chunk of lowercased paths."""
+    return [classify_path(p) for p in paths_lower]
+
+
+def classify_files(files: Iterable[Dict], jobs: int = 1) -> Iterator[Tuple[Dict, Optional[Tuple]]]:
+    """Yield (entry, classify_path result) in input order.
+
+    With jobs > 1 the regex work is spread over worker processes in chunks of
+    CLASSIFY_CHUNK_ROWS; at most 2 * jobs chunks are in flight at a time, so
+    memory stays bounded while the CSV keeps streaming.
+    """
+    if jobs <= 1:
+        for f in files:
+            yield f, classify_path(f["path_lower"])
+        return
+    files = iter(files)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = deque()
+        while True:
+            chunk = list(itertools.islice(files, CLASSIFY_CHUNK_ROWS))
+            if chunk:
+                pending.append((chunk, pool.submit(classify_paths, [f["path_lower"] for f in chunk])))
+            if pending and (not chunk or len(pending) >= 2 * jobs):
+                done, future = pending.popleft()
+                yield from zip(done, future.result())
+            elif not chunk:
+                return
+
+
+def iter_csv(csv_path: str, only_dirs: Optional[bool] = None) -> Iterator[Dict[str, Any]]:
+    """Stream scan_disk.py CSV rows one entry at a time.
+
+    Header: path,size,allocated,modified,is_dir,files_count,folders_count.
+    Entries are yielded as they are parsed so commands can aggregate in a single
+    pass without holding the whole scan in memory. With only_dirs=True/False,
+    rows of the other kind are dropped before any other column is parsed.
+    """
+    # Large binary reads cut syscalls; newline="" leaves line endings to csv
+    raw = open(csv_path, "rb", buffering=1 << 23)
+    with io.TextIOWrapper(raw, encoding="utf-8-sig", errors="ignore", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return
+        # Resolve column positions once; columns missing from the header read as ""
+        header = [h.strip().lower() for h in header]
+        idx = [header.index(c) if c in header else len(header) for c in CSV_COLUMNS]
+        min_len = max(idx) + 1
+        pick = operator.itemgetter(*idx)
         for row in reader:
-            row = {k.strip().lower(): v for k, v in row.items()} if row else {}
+            if len(row) < min_len:
+                row = row + [""] * (min_len - len(row))
+            path, size_s, allocated_s, modified, is_dir_s, files_s, folders_s = pick(row)
+            is_dir = (is_dir_s or "0").strip() in ("1", "true", "yes")
+            if only_dirs is not None and is_dir != only_dirs:
+                continue
             try:
-                path = (row.get("path") or "").strip()
+                path = path.strip()
                 if not path:
                     continue
-                size = parse_size(row.get("size") or "0")
-                allocated = parse_size(row.get("allocated") or "0")
-                modified = (row.get("modified") or "").strip()
-                is_dir = (row.get("is_dir") or "0").strip() in ("1", "true", "yes")
-                files_count = int(row.get("files_count") or 0) if row.get("files_count") else 0
-                folders_count = int(row.get("folders_count") or 0) if row.get("folders_count") else 0
+                if path.endswith("/"):
+                    path = path.rstrip("/") or "/"
+                size = parse_size(size_s)
+                allocated = parse_size(allocated_s)
+                modified = modified.strip()
+                files_count = int(files_s) if files_s else 0
+                folders_count = int(folders_s) if folders_s else 0
                 depth = get_path_depth(path)
-                name = path.rstrip("/").split("/")[-1] if path else ""
-                ext = Path(path).suffix.lower() if not is_dir else ""
+                name = path.rpartition("/")[2]
+                ext = ""
+                if not is_dir:
+                    base, dot, suffix = name.rpartition(".")
+                    if base and suffix:
+                        ext = "." + suffix.lower()
                 entry = {
                     "path": path,
                     "size": size,
@@ -157,40 +320,123 @@ def read_csv(csv_path: str) -> List[Dict[str, Any]]:
                     "depth": depth,
                     "name": name,
                     "ext": ext,
+                    # Lowercased once here for case-insensitive matching
+                    "path_lower": path.lower(),
+                    "name_lower": name.lower(),
                 }
-                files.append(entry)
             except (ValueError, TypeError):
                 continue
-    return files
+            yield entry
+
 
+def iter_cached(csv_path: str, only_dirs: Optional[bool] = None) -> Iterator[Dict[str, Any]]:
+    """Like iter_csv, but backed by a pickle cache next to the CSV.
 
-def cmd_summary(files: List[Dict]) -> Dict:
-    total_size = sum(f["size"] for f in files if not f["is_dir"])
-    total_files = sum(1 for f in files if not f["is_dir"])
-    total_dirs = sum(1 for f in files if f["is_dir"])
-    by_ext = defaultdict(lambda: {"count": 0, "size": 0})
+    The cache (<csv_path>.cache.pkl) is keyed by the CSV's size and mtime plus
+    CACHE_VERSION, so a rescan invalidates it. On a miss the CSV is parsed as
+    usual and the cache is written in chunks while rows stream through, then
+    moved into place atomically.
+    """
+    cache_path = csv_path + ".cache.pkl"
+    st = os.stat(csv_path)
+    key = (CACHE_VERSION, st.st_size, st.st_mtime_ns)
+    try:
+        f = open(cache_path, "rb")
+    except OSError:
+        f = None
+    if f is not None:
+        with f:
+            try:
+                hit = pickle.load(f) == key
+            except Exception:
+                hit = False
+            if hit:
+                yielded = False
+                while True:
+                    try:
+                        chunk = pickle.load(f)
+                    except EOFError:
+                        return
+                    except Exception:
+                        # Truncated or corrupt cache: re-parse and rewrite it,
+                        # unless rows already went out to the caller. Then the
+                        # caller has to start over; the bad file is removed so
+                        # the next --cache run rebuilds it.
+                        if yielded:
+                            try:
+                                os.remove(cache_path)
+                            except OSError:
+                                pass
+                            raise CacheCorruptError(f"corrupt cache file {cache_path}")
+                        break
+                    for entry in chunk:
+                        if only_dirs is None or entry["is_dir"] == only_dirs:
+                            yielded = True
+                            yield entry
+
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        out = open(tmp_path, "wb")
+    except OSError:
+        # Read-only location: fall back to plain parsing
+        yield from iter_csv(csv_path, only_dirs)
+        return
+    try:
+        chunk = []
+        with out:
+            pickle.dump(key, out, pickle.HIGHEST_PROTOCOL)
+            # The cache holds every row, so parse without the only_dirs pushdown
+            for entry in iter_csv(csv_path):
+                chunk.append(entry)
+                if len(chunk) >= CACHE_CHUNK_ROWS:
+                    pickle.dump(chunk, out, pickle.HIGHEST_PROTOCOL)
+                    chunk = []
+                if only_dirs is None or entry["is_dir"] == only_dirs:
+                    yield entry
+            if chunk:
+                pickle.dump(chunk, out, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def cmd_summary(files: Iterable[Dict]) -> Dict:
+    total_size = 0
+    total_files = 0
+    total_dirs = 0
+    # Per-extension totals kept as parallel counters rather than a dict per ext
+    ext_count = defaultdict(int)
+    ext_size = defaultdict(int)
     for f in files:
-        if not f["is_dir"] and f["ext"]:
-            by_ext[f["ext"]]["count"] += 1
-            by_ext[f["ext"]]["size"] += f["size"]
-    top_extensions = sorted(by_ext.items(), key=lambda x: x[1]["size"], reverse=True)[:10]
+        if f["is_dir"]:
+            total_dirs += 1
+            continue
+        size = f["size"]
+        total_size += size
+        total_files += 1
+        ext = f["ext"]
+        if ext:
+            ext_count[ext] += 1
+            ext_size[ext] += size
+    top_extensions = heapq.nlargest(10, ext_size.items(), key=operator.itemgetter(1))
     result = {
         "total_size": format_size(total_size),
         "total_size_bytes": total_size,
         "total_files": total_files,
         "total_directories": total_dirs,
         "top_extensions": [
-            {"ext": ext, "count": data["count"], "size": format_size(data["size"])}
-            for ext, data in top_extensions
+            {"ext": ext, "count": ext_count[ext], "size": format_size(size)}
+            for ext, size in top_extensions
         ],
     }
     print(json.dumps(result, indent=2, ensure_ascii=False))
     return result
 
 
-def cmd_largest(files: List[Dict], limit: int = 20) -> List[Dict]:
-    file_only = [f for f in files if not f["is_dir"]]
-    sorted_files = sorted(file_only, key=lambda x: x["size"], reverse=True)[:limit]
+def cmd_largest(files: Iterable[Dict], limit: int = 20) -> List[Dict]:
+    file_only = (f for f in files if not f["is_dir"])
+    sorted_files = heapq.nlargest(limit, file_only, key=lambda x: x["size"])
     result = [
         {"path": f["path"], "size": format_size(f["size"]), "size_bytes": f["size"]}
         for f in sorted_files
@@ -199,42 +445,44 @@ def cmd_largest(files: List[Dict], limit: int = 20) -> List[Dict]:
     return result
 
 
-def cmd_by_type(files: List[Dict], limit: int = 30) -> List[Dict]:
-    by_ext = defaultdict(lambda: {"count": 0, "size": 0})
+def cmd_by_type(files: Iterable[Dict], limit: int = 30) -> List[Dict]:
+    ext_count = defaultdict(int)
+    ext_size = defaultdict(int)
     for f in files:
         if not f["is_dir"]:
             ext = f["ext"] if f["ext"] else "(no extension)"
-            by_ext[ext]["count"] += 1
-            by_ext[ext]["size"] += f["size"]
-    sorted_types = sorted(by_ext.items(), key=lambda x: x[1]["size"], reverse=True)[:limit]
+            ext_count[ext] += 1
+            ext_size[ext] += f["size"]
+    sorted_types = heapq.nlargest(limit, ext_size.items(), key=operator.itemgetter(1))
     result = [
         {
             "extension": ext,
-            "count": data["count"],
-            "size": format_size(data["size"]),
-            "size_bytes": data["size"],
+            "count": ext_count[ext],
+            "size": format_size(size),
+            "size_bytes": size,
         }
-        for ext, data in sorted_types
+        for ext, size in sorted_types
     ]
     print(json.dumps(result, indent=2, ensure_ascii=False))
     return result
 
 
-def cmd_top_folders(files: List[Dict], max_depth: int = 2, limit: int = 10) -> Dict:
-    # Find minimum depth (scan root depth) to calculate relative depths
-    min_depth = min((f["depth"] for f in files if f["is_dir"]), default=0)
-
-    by_rel_depth = defaultdict(list)
-    for f in files:
+def cmd_top_folders(files: Iterable[Dict], max_depth: int = 2, limit: int = 10) -> Dict:
+    # The scan root depth is only known once every row has been seen, so keep a
+    # bounded heap per absolute depth and resolve relative depths at the end.
+    # Heap items are (size, -seq, entry): ties keep CSV order like a stable sort.
+    by_depth = defaultdict(list)
+    for seq, f in enumerate(files):
         if f["is_dir"]:
-            rel_depth = f["depth"] - min_depth
-            if rel_depth > 0:  # Exclude the root itself (rel_depth=0)
-                by_rel_depth[rel_depth].append(f)
+            push_top(by_depth[f["depth"]], limit, (f["size"], -seq, f))
+
+    # Minimum depth (scan root depth) to calculate relative depths
+    min_depth = min(by_depth, default=0)
 
     result = {"depths": {}, "scan_root_depth": min_depth}
-    for rel_depth in range(1, max_depth + 1):
-        if rel_depth in by_rel_depth:
-            sorted_dirs = sorted(by_rel_depth[rel_depth], key=lambda x: x["size"], reverse=True)[:limit]
+    for rel_depth in range(1, max_depth + 1):  # Exclude the root itself (rel_depth=0)
+        if min_depth + rel_depth in by_depth:
+            sorted_dirs = [item[2] for item in sorted(by_depth[min_depth + rel_depth], reverse=True)]
             result["depths"][rel_depth] = [
                 {
                     "path": d["path"],
@@ -249,27 +497,27 @@ def cmd_top_folders(files: List[Dict], max_depth: int = 2, limit: int = 10) -> D
     return result
 
 
-def cmd_folder(files: List[Dict], target_path: str, depth: int = 1) -> Dict:
+def cmd_folder(files: Iterable[Dict], target_path: str, depth: int = 1) -> Dict:
     prefix = target_path.rstrip("/")
     target = prefix + "/"
     target_depth = get_path_depth(prefix)
     seen_paths = set()
     children = []
     for f in files:
-        p = f["path"].rstrip("/")
-        if p == prefix:
+        # Integer depth test first: it rejects most rows without touching the path
+        rel_depth = f["depth"] - target_depth
+        if rel_depth < 1 or rel_depth > depth:
             continue
-        if not (p + "/").startswith(target):
+        if rel_depth < depth and not f["is_dir"]:
+            continue
+        # Paths are normalized without a trailing "/" by iter_csv
+        p = f["path"]
+        if not p.startswith(target):
             continue
         # Deduplicate by path
         if p in seen_paths:
             continue
         seen_paths.add(p)
-        rel_depth = f["depth"] - target_depth
-        if rel_depth < 1 or rel_depth > depth:
-            continue
-        if rel_depth < depth and not f["is_dir"]:
-            continue
         children.append({
             "path": f["path"],
             "name": f["name"],
@@ -280,7 +528,7 @@ def cmd_folder(files: List[Dict], target_path: str, depth: int = 1) -> Dict:
             "files_count": f.get("files_count", 0),
             "folders_count": f.get("folders_count", 0),
         })
-    children = sorted(children, key=lambda x: x["size_bytes"], reverse=True)[:50]
+    children = heapq.nlargest(50, children, key=lambda x: x["size_bytes"])
     result = {
         "path": target_path.rstrip("/"),
         "depth": depth,
@@ -292,58 +540,50 @@ def cmd_folder(files: List[Dict], target_path: str, depth: int = 1) -> Dict:
     return result
 
 
-def cmd_cleanable(files: List[Dict]) -> Dict:
-    cleanable = defaultdict(
-        lambda: {"files": [], "total_size": 0, "reason": "", "migration_hints": set(), "safety": "safe"}
-    )
-    for f in files:
-        if f["is_dir"]:
+def cmd_cleanable(files: Iterable[Dict], jobs: int = 1) -> Dict:
+    cleanable = defaultdict(CleanableBucket)
+    files = (f for f in files if not f["is_dir"])
+    for seq, (f, match) in enumerate(classify_files(files, jobs)):
+        if match is None:
             continue
-        path_lower = f["path"].lower()
-        for pattern_re, category, reason, migration_hint in CLEANABLE_PATTERNS_COMPILED:
-            if pattern_re.search(path_lower):
-                cleanable[category]["files"].append({
-                    "path": f["path"],
-                    "size": format_size(f["size"]),
-                    "size_bytes": f["size"],
-                })
-                cleanable[category]["total_size"] += f["size"]
-                cleanable[category]["reason"] = reason
-                cleanable[category]["safety"] = SAFETY_LEVELS.get(category, "check")
-                if migration_hint:
-                    cleanable[category]["migration_hints"].add(migration_hint)
-                break
-    for category in cleanable:
-        # Save actual file count before truncating
-        cleanable[category]["actual_file_count"] = len(cleanable[category]["files"])
-        cleanable[category]["files"] = sorted(
-            cleanable[category]["files"], key=lambda x: x["size_bytes"], reverse=True
-        )[:50]
+        category, reason, migration_hint = match
+        bucket = cleanable[category]
+        # Only the largest files per category are kept, unformatted, as samples
+        push_top(bucket.files, 10, (f["size"], -seq, f["path"]))
+        bucket.file_count += 1
+        bucket.total_size += f["size"]
+        bucket.reason = reason
+        bucket.safety = SAFETY_LEVELS.get(category, "check")
+        if migration_hint:
+            bucket.migration_hints.add(migration_hint)
+    total_cleanable = sum(d.total_size for d in cleanable.values())
     result = {
         "categories": {
             cat: {
-                "reason": data["reason"],
-                "safety": data["safety"],
-                "total_size": format_size(data["total_size"]),
-                "total_size_bytes": data["total_size"],
-                "file_count": data["actual_file_count"],
-                "migration_hints": list(data["migration_hints"]) if data["migration_hints"] else None,
-                "sample_files": data["files"][:10],
+                "reason": data.reason,
+                "safety": data.safety,
+                "total_size": format_size(data.total_size),
+                "total_size_bytes": data.total_size,
+                "file_count": data.file_count,
+                "migration_hints": list(data.migration_hints) if data.migration_hints else None,
+                "sample_files": [
+                    {"path": path, "size": format_size(size), "size_bytes": size}
+                    for size, _, path in sorted(data.files, reverse=True)
+                ],
             }
             for cat, data in sorted(
-                cleanable.items(), key=lambda x: x[1]["total_size"], reverse=True
+                cleanable.items(), key=lambda x: x[1].total_size, reverse=True
             )
         },
         "by_safety": {"safe": [], "check": [], "admin": []},
-        "total_cleanable_size": format_size(sum(d["total_size"] for d in cleanable.values())),
-        "total_cleanable_bytes": sum(d["total_size"] for d in cleanable.values()),
+        "total_cleanable_size": format_size(total_cleanable),
+        "total_cleanable_bytes": total_cleanable,
     }
     for cat, data in cleanable.items():
-        safety = data["safety"]
-        result["by_safety"].setdefault(safety, []).append({
+        result["by_safety"].setdefault(data.safety, []).append({
             "category": cat,
-            "size": format_size(data["total_size"]),
-            "size_bytes": data["total_size"],
+            "size": format_size(data.total_size),
+            "size_bytes": data.total_size,
         })
     for safety in result["by_safety"]:
         result["by_safety"][safety] = sorted(
@@ -353,26 +593,44 @@ def cmd_cleanable(files: List[Dict]) -> Dict:
     return result
 
 
-def cmd_search(files: List[Dict], pattern: str) -> List[Dict]:
-    # Escape special regex chars, then convert glob wildcards
-    escaped = re.escape(pattern)
-    regex = escaped.replace(r"\*", ".*").replace(r"\?", ".")
-    matches = []
-    for f in files:
-        if re.search(regex, f["name"]):
-            matches.append({
-                "path": f["path"],
-                "size": format_size(f["size"]),
-                "size_bytes": f["size"],
-                "is_dir": f["is_dir"],
-            })
-    matches = sorted(matches, key=lambda x: x["size_bytes"], reverse=True)[:100]
+def cmd_search(files: Iterable[Dict], pattern: str) -> List[Dict]:
+    # Glob (*, ?, [...]) anchored to the whole name. The common shapes (name,
+    # *.ext, prefix*, *text*) reduce to plain string tests on the lowercased
+    # name; anything else is compiled to a regex once.
+    key, test = "name_lower", None
+    core = pattern.lower()
+    if core.startswith("*") and core.endswith("*") and len(core) > 1:
+        core = core[1:-1]
+        if not any(c in core for c in "*?["):
+            test = lambda name: core in name
+    elif core.startswith("*"):
+        core = core[1:]
+        if not any(c in core for c in "*?["):
+            test = lambda name: name.endswith(core)
+    elif core.endswith("*"):
+        core = core[:-1]
+        if not any(c in core for c in "*?["):
+            test = lambda name: name.startswith(core)
+    elif not any(c in core for c in "*?["):
+        test = core.__eq__
+    if test is None:
+        key, test = "name", re.compile(fnmatch.translate(pattern), re.IGNORECASE).match
+    top = heapq.nlargest(100, (f for f in files if test(f[key])), key=lambda x: x["size"])
+    matches = [
+        {
+            "path": f["path"],
+            "size": format_size(f["size"]),
+            "size_bytes": f["size"],
+            "is_dir": f["is_dir"],
+        }
+        for f in top
+    ]
     result = {"pattern": pattern, "matches": matches, "count": len(matches)}
     print(json.dumps(result, indent=2, ensure_ascii=False))
     return result
 
 
-def cmd_filter(files: List[Dict], conditions: str) -> List[Dict]:
+def cmd_filter(files: Iterable[Dict], conditions: str) -> List[Dict]:
     def parse_condition(cond: str) -> Tuple[str, str, str]:
         for op in [">=", "<=", ">", "<", "=", "~"]:
             if op in cond:
@@ -380,46 +638,52 @@ def cmd_filter(files: List[Dict], conditions: str) -> List[Dict]:
                 return parts[0].strip(), op, parts[1].strip()
         return cond, "=", "true"
 
-    def matches_condition(f: Dict, field: str, op: str, value: str) -> bool:
-        if field == "size":
-            cmp_size = parse_size(value)
-            if op == ">": return f["size"] > cmp_size
-            if op == ">=": return f["size"] >= cmp_size
-            if op == "<": return f["size"] < cmp_size
-            if op == "<=": return f["size"] <= cmp_size
-            if op == "=": return f["size"] == cmp_size
-        elif field == "ext":
+    compare_ops = {
+        ">": operator.gt,
+        ">=": operator.ge,
+        "<": operator.lt,
+        "<=": operator.le,
+        "=": operator.eq,
+    }
+
+    def compile_condition(field: str, op: str, value: str) -> Optional[Callable[[Dict], bool]]:
+        """Build a row predicate with the value parsed once; None matches every row."""
+        if field in ("size", "depth"):
+            compare = compare_ops.get(op)
+            if compare is None:
+                return None
+            cmp_value = parse_size(value) if field == "size" else int(value)
+            return lambda f: compare(f[field], cmp_value)
+        if field == "ext":
             cmp_ext = value.lower() if value.startswith(".") else "." + value.lower()
-            return (f["ext"] or "").lower() == cmp_ext
-        elif field == "path":
+            return lambda f: f["ext"] == cmp_ext
+        if field in ("path", "name"):
+            key = field + "_lower"
+            cmp_text = value.lower()
             if op == "~":
-                return value.lower() in f["path"].lower()
-            return f["path"].lower() == value.lower()
-        elif field == "name":
-            if op == "~":
-                return value.lower() in (f["name"] or "").lower()
-            return (f["name"] or "").lower() == value.lower()
-        elif field == "depth":
-            cmp_depth = int(value)
-            if op == ">": return f.get("depth", 0) > cmp_depth
-            if op == ">=": return f.get("depth", 0) >= cmp_depth
-            if op == "<": return f.get("depth", 0) < cmp_depth
-            if op == "<=": return f.get("depth", 0) <= cmp_depth
-            if op == "=": return f.get("depth", 0) == cmp_depth
-        return True
+                return lambda f: cmp_text in f[key]
+            return lambda f: f[key] == cmp_text
+        return None
 
     cond_list = [parse_condition(c.strip()) for c in conditions.split(",")]
-    matches = []
-    for f in files:
+    predicates = [
+        pred for pred in (compile_condition(field, op, val) for field, op, val in cond_list)
+        if pred is not None
+    ]
+
+    def keep(f: Dict) -> bool:
         if f["is_dir"]:
-            continue
-        if all(matches_condition(f, field, op, val) for field, op, val in cond_list):
-            matches.append({
-                "path": f["path"],
-                "size": format_size(f["size"]),
-                "size_bytes": f["size"],
-            })
-    matches = sorted(matches, key=lambda x: x["size_bytes"], reverse=True)[:100]
+            return False
+        for pred in predicates:
+            if not pred(f):
+                return False
+        return True
+
+    top = heapq.nlargest(100, filter(keep, files), key=lambda x: x["size"])
+    matches = [
+        {"path": f["path"], "size": format_size(f["size"]), "size_bytes": f["size"]}
+        for f in top
+    ]
     result = {"conditions": conditions, "matches": matches, "count": len(matches)}
     print(json.dumps(result, indent=2, ensure_ascii=False))
     return result
@@ -436,16 +700,8 @@ def get_option(name: str, default: int) -> int:
     return default
 
 
-def main():
-    if len(sys.argv) < 3:
-        print(__doc__)
-        sys.exit(1)
-    csv_path = sys.argv[1]
-    command = sys.argv[2].lower()
-    if not Path(csv_path).exists():
-        print(f"Error: CSV file not found: {csv_path}", file=sys.stderr)
-        sys.exit(1)
-    files = read_csv(csv_path)
+def run_command(command: str, files: Iterable[Dict[str, Any]]) -> None:
+    """Dispatch a command to its cmd_* function with rows from files."""
     if command == "summary":
         cmd_summary(files)
     elif command == "largest":
@@ -464,7 +720,7 @@ def main():
             sys.exit(1)
         cmd_folder(files, sys.argv[3], get_option("--depth", 1))
     elif command == "cleanable":
-        cmd_cleanable(files)
+        cmd_cleanable(files, get_option("--jobs", 1))
     elif command == "search":
         if len(sys.argv) < 4:
             print("Usage: analyze_disk.py <csv> search <pattern>", file=sys.stderr)
@@ -481,5 +737,31 @@ def main():
         sys.exit(1)
 
 
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    csv_path = sys.argv[1]
+    command = sys.argv[2].lower()
+    if not Path(csv_path).exists():
+        print(f"Error: CSV file not found: {csv_path}", file=sys.stderr)
+        sys.exit(1)
+    read = iter_cached if "--cache" in sys.argv else iter_csv
+    if command in ("largest", "by-type", "cleanable", "filter"):
+        # File-only commands never look at directory rows
+        only_dirs = False
+    elif command == "top-folders":
+        only_dirs = True
+    else:
+        only_dirs = None
+    try:
+        run_command(command, read(csv_path, only_dirs))
+    except CacheCorruptError as e:
+        # Commands print only after consuming every row, so nothing has been
+        # output yet and the command can simply run again from the CSV
+        print(f"Warning: {e}, re-parsing the CSV", file=sys.stderr)
+        run_command(command, iter_csv(csv_path, only_dirs))
+
+
 if __name__ == "__main__":
     main()
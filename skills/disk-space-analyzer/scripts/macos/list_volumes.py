@@ -18,7 +18,7 @@ from pathlib import Path
 def main():
     try:
         out = subprocess.check_output(
-            ["df", "-k"],
+            ["df", "-Pk"],
             text=True,
             stderr=subprocess.DEVNULL,
         )
@@ -51,22 +51,22 @@ def main():
         return
     # Skip header
     for line in lines[1:]:
-        parts = line.split()
-        if len(parts) < 9:
+        # POSIX df -Pk: Filesystem 1024-blocks Used Available Capacity Mounted on
+        # Index:        0          1           2    3         4        5
+        # One row per filesystem; maxsplit keeps spaces in the mount point
+        parts = line.split(None, 5)
+        if len(parts) < 6:
             continue
-        # macOS df -k: Filesystem 1024-blocks Used Available Capacity iused ifree %iused Mounted on
-        # Index:       0          1           2    3         4        5      6     7      8+
         try:
             total_1k = int(parts[1])
             used_1k = int(parts[2])
             avail_1k = int(parts[3])
-            # Mount point starts at index 8 and may contain spaces
-            mount = " ".join(parts[8:])
-        except (ValueError, IndexError):
+        except ValueError:
             continue
-        total_bytes = total_1k * 1024
-        free_bytes = avail_1k * 1024
-        used_bytes = used_1k * 1024
+        mount = parts[5]
+        total_bytes = total_1k << 10
+        free_bytes = avail_1k << 10
+        used_bytes = used_1k << 10
         name = mount.rstrip("/").split("/")[-1] or "root"
         volumes.append({
             "mount_point": mount,
@@ -10,33 +10,109 @@ Options:
     --max-depth N       Limit scan to N levels deep (default: unlimited)
     --exclude PATTERN   Exclude paths matching pattern (can be used multiple times)
                         Supports glob patterns: node_modules, *.log, Library/Caches
+    --threads N         Scan top-level subdirectories in N parallel threads (default: 1)
 
 Output CSV columns: path,size,allocated,modified,is_dir,files_count,folders_count
 Paths are absolute, POSIX style. Run from the skill directory (containing scripts/).
 """
 
 import argparse
-import csv
 import fnmatch
 import os
+import re
 import sys
+import threading
 import time
-from pathlib import Path
-from typing import List, Optional
-
-
-def norm_path(p: Path) -> str:
-    """Return absolute POSIX path string."""
-    return p.resolve().as_posix()
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+CSV_COLUMNS = ("path", "size", "allocated", "modified", "is_dir", "files_count", "folders_count")
+
+# Characters that make an --exclude pattern a glob rather than a plain name
+GLOB_CHARS = re.compile(r"[*?[]").search
+
+# Characters that make csv.writer (QUOTE_MINIMAL) quote a field
+NEEDS_QUOTING = re.compile(r'[,"\r\n]').search
+
+# Decimal text of small counts, looked up instead of formatted per row
+# (files_count / folders_count are almost always below this)
+SMALL_INTS = [str(i) for i in range(4096)]
+SMALL_INTS_MAX = len(SMALL_INTS)
+
+# Rows buffered before one os.write (~1 MiB at typical path lengths)
+WRITE_BATCH_ROWS = 8192
+
+# Directory rows are the only rows held in memory, as compact lists:
+# [path, size, modified, files_count, folders_count, parent row or None].
+# allocated and is_dir are implied (= size, 1) and only added when written.
+DirRow = List[Any]
+# (dir path, its lstat or None if that failed, parent directory row, depth below root)
+StackItem = Tuple[str, Optional[os.stat_result], Optional[DirRow], int]
+
+# scandir() accepts a directory fd on POSIX; entries then stat relative to it
+SCANDIR_FD = os.scandir in os.supports_fd
+DIR_OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0)
+
+MTIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+MTIME_CACHE_MAX = 1 << 16
+_mtime_cache: Dict[int, str] = {}
+
+
+def format_mtime(mtime_ns: int) -> str:
+    """Format an mtime as local time, memoized per second.
+
+    Files written together (checkouts, installs, builds) share mtimes, so most
+    lookups hit. The cache is simply cleared when it grows past MTIME_CACHE_MAX.
+    """
+    seconds = mtime_ns // 1_000_000_000  # floor, like time.localtime
+    text = _mtime_cache.get(seconds)
+    if text is None:
+        if len(_mtime_cache) >= MTIME_CACHE_MAX:
+            _mtime_cache.clear()
+        text = _mtime_cache[seconds] = time.strftime(MTIME_FORMAT, time.localtime(seconds))
+    return text
+
+
+def compile_excludes(patterns: List[str]) -> Callable[[str, str], bool]:
+    """Build the --exclude test, is_excluded(name, path).
+
+    A pattern excludes an entry when the name matches it or the path contains
+    a match. For plain names like node_modules (no *, ?, [) that is a substring
+    search of the path, which also covers the name, so they skip fnmatch and
+    share one escaped alternation; only real globs are translated.
+    """
+    literals = [p for p in patterns if not GLOB_CHARS(p)]
+    globs = [p for p in patterns if GLOB_CHARS(p)]
+    literal_search = re.compile("|".join(map(re.escape, literals))).search if literals else None
+    if not globs:
+        return lambda name, path: literal_search(path) is not None
+    # Compiled once into one alternation per test
+    name_match = re.compile("|".join(fnmatch.translate(p) for p in globs)).match
+    path_match = re.compile("|".join(fnmatch.translate(f"*{p}*") for p in globs)).match
+    if literal_search is None:
+        return lambda name, path: bool(name_match(name) or path_match(path))
+    return lambda name, path: bool(literal_search(path) or name_match(name) or path_match(path))
+
+
+def write_all(fd: int, data: bytes) -> None:
+    """os.write until all of data is written (it may write less per call)."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def stat_or_none(entry: os.DirEntry) -> Optional[os.stat_result]:
+    try:
+        return entry.stat(follow_symlinks=False)
+    except OSError:
+        return None
 
 
-def matches_exclude(path: str, name: str, exclude_patterns: List[str]) -> bool:
-    """Check if path or name matches any exclude pattern."""
-    for pattern in exclude_patterns:
-        # Match against full path or just the name
-        if fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(path, f"*{pattern}*"):
-            return True
-    return False
+def csv_field(text: str) -> str:
+    """Quote a text field exactly as csv.writer would, only when needed."""
+    if NEEDS_QUOTING(text):
+        return '"' + text.replace('"', '""') + '"'
+    return text
 
 
 def scan(
@@ -46,145 +122,238 @@ def scan(
     progress_interval: int = 10000,
     max_depth: Optional[int] = None,
     exclude_patterns: Optional[List[str]] = None,
+    threads: int = 1,
 ) -> None:
-    root = Path(root_path).resolve()
-    if not root.is_dir():
+    # Resolved once; every other path is built from it by scandir
+    root = os.path.realpath(root_path)
+    if not os.path.isdir(root):
         print(f"Error: not a directory: {root_path}", file=sys.stderr)
         sys.exit(1)
 
     exclude_patterns = exclude_patterns or []
-    root_depth = len(root.parts)
-
-    rows = []
-    seen_paths = set()  # Track seen paths to avoid duplicates (hardlinks/firmlinks)
-    count = 0
+    if exclude_patterns:
+        is_excluded = compile_excludes(exclude_patterns)
+
+    # (st_dev, st_ino) of entries that can be reached twice: directories
+    # (firmlinks on macOS) and files with more than one hard link
+    seen: Set[Tuple[int, int]] = set()
+    # Guards seen, count and the output file when scanning with threads
+    lock = threading.Lock()
+    count: int = 0
+    # Progress is considered once per progress_interval rows, then printed
+    # at most every 5 seconds
+    next_progress_at = progress_interval
     last_progress = time.monotonic()
 
-    try:
-        for dirpath, dirnames, filenames in os.walk(root, topdown=True, followlinks=False):
-            dir_path = Path(dirpath)
-            current_depth = len(dir_path.parts) - root_depth
+    def first_visit(st: os.stat_result) -> bool:
+        key = (st.st_dev, st.st_ino)
+        with lock:
+            if key in seen:
+                return False
+            seen.add(key)
+            return True
 
-            # Check max depth - prune subdirectories if at max depth
-            if max_depth is not None and current_depth >= max_depth:
-                dirnames[:] = []  # Don't descend further
+    def visit(item: StackItem, dir_rows: List[DirRow], write: Callable[[str], None]) -> List[StackItem]:
+        """Scan one directory: write its file rows, record its directory row
+        and return its subdirectories as stack items."""
+        nonlocal count, next_progress_at, last_progress
+        dir_posix, st, parent_row, current_depth = item
+
+        # Skip if already seen (can happen with firmlinks on macOS)
+        if st is not None and not first_visit(st):
+            return []
+
+        # Listing through an open directory fd makes DirEntry.stat() an
+        # fstatat() relative to it, so the kernel does not walk the full
+        # path again for every entry
+        try:
+            dir_fd = os.open(dir_posix, DIR_OPEN_FLAGS) if SCANDIR_FD else None
+        except OSError:
+            # Unreadable directory: skip it like os.walk did
+            return []
+        try:
+            subdirs: List[os.DirEntry] = []
+            filenames: List[os.DirEntry] = []
+            try:
+                with os.scandir(dir_posix if dir_fd is None else dir_fd) as it:
+                    for entry in it:
+                        # Symlinks are never followed; they are listed as files
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry)
+                        else:
+                            filenames.append(entry)
+            except OSError:
+                return []
+            # Entries listed from an fd only carry their name
+            prefix = dir_posix if dir_posix.endswith("/") else dir_posix + "/"
 
-            # Optional: skip hidden dirs from being entered
+            # Optional: skip hidden entries
             if skip_hidden:
-                dirnames[:] = [d for d in dirnames if not d.startswith(".")]
-                filenames = [f for f in filenames if not f.startswith(".")]
+                subdirs = [d for d in subdirs if not d.name.startswith(".")]
+                filenames = [e for e in filenames if not e.name.startswith(".")]
+            files_count = len(filenames)
 
-            # Apply exclude patterns to directories
+            # Check max depth - don't descend further if at max depth
+            if max_depth is not None and current_depth >= max_depth:
+                subdirs = []
+
+            # Apply exclude patterns once per directory so the per-entry
+            # loops below carry no filter checks when there are none
             if exclude_patterns:
-                dir_posix_temp = norm_path(dir_path)
-                dirnames[:] = [
-                    d for d in dirnames
-                    if not matches_exclude(f"{dir_posix_temp}/{d}", d, exclude_patterns)
+                subdirs = [
+                    d for d in subdirs
+                    if not is_excluded(d.name, prefix + d.name)
+                ]
+                # Excluded files still count towards files_count
+                filenames = [
+                    e for e in filenames
+                    if not is_excluded(e.name, prefix + e.name)
                 ]
-
-            dir_posix = norm_path(dir_path)
-
-            # Skip if already seen (can happen with firmlinks on macOS)
-            if dir_posix in seen_paths:
-                continue
-            seen_paths.add(dir_posix)
-
-            # Use already-filtered lists (filtered at lines 74-75 if skip_hidden)
-            subdirs = dirnames
-            subfiles = filenames
 
             # Directory row
-            try:
-                mtime = dir_path.stat().st_mtime
-                mod_str = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(mtime))
-            except OSError:
+            if st is not None:
+                mod_str = format_mtime(st.st_mtime_ns)
+            else:
                 mod_str = ""
 
-            rows.append({
-                "path": dir_posix,
-                "size": 0,
-                "allocated": 0,
-                "modified": mod_str,
-                "is_dir": 1,
-                "files_count": len(subfiles),
-                "folders_count": len(subdirs),
-            })
-            count += 1
+            # Size is filled in below and by the roll-up
+            dir_row: DirRow = [dir_posix, 0, mod_str, files_count, len(subdirs), parent_row]
+            dir_rows.append(dir_row)
+            rows = 1
+            files_total = 0
 
             # File rows
-            for name in filenames:
-                if skip_hidden and name.startswith("."):
-                    continue
-                fp = dir_path / name
-                fp_posix = norm_path(fp)
-                # Skip if already seen (hardlinks/firmlinks)
-                if fp_posix in seen_paths:
-                    continue
-                seen_paths.add(fp_posix)
-                # Apply exclude patterns to files
-                if exclude_patterns and matches_exclude(fp_posix, name, exclude_patterns):
-                    continue
+            for entry in filenames:
+                fp_posix = prefix + entry.name
                 try:
-                    if fp.is_symlink():
-                        st = os.lstat(fp)
-                    else:
-                        st = fp.stat()
+                    st = entry.stat(follow_symlinks=False)
+                    # Skip if already seen (hardlinks)
+                    if st.st_nlink > 1 and not first_visit(st):
+                        continue
                     size = st.st_size
-                    mod_str = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(st.st_mtime))
+                    mod_str = format_mtime(st.st_mtime_ns)
                 except OSError:
                     size = 0
                     mod_str = ""
 
-                rows.append({
-                    "path": fp_posix,
-                    "size": size,
-                    "allocated": size,
-                    "modified": mod_str,
-                    "is_dir": 0,
-                    "files_count": 0,
-                    "folders_count": 0,
-                })
-                count += 1
-
-            if count >= progress_interval and (count % progress_interval) < len(filenames) + 1:
+                # File rows are final as soon as they are read
+                write(f"{csv_field(fp_posix)},{size},{size},{mod_str},0,0,0\r\n")
+                files_total += size
+                rows += 1
+            dir_row[1] = files_total
+
+            # Subdirectories are stat'ed now, while the fd they are relative
+            # to is still open. Reversed so they pop in enumeration order.
+            child_depth = current_depth + 1
+            children: List[StackItem] = [
+                (prefix + d.name, stat_or_none(d), dir_row, child_depth)
+                for d in reversed(subdirs)
+            ]
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
+
+        # The progress state is shared by worker threads, so it is read and
+        # claimed under the lock; only the print happens outside it
+        with lock:
+            count += rows
+            total = count
+            due = False
+            if total >= next_progress_at:
+                next_progress_at = total + progress_interval
                 now = time.monotonic()
                 if now - last_progress >= 5.0:
-                    print(f"Progress: {count} entries, current: {dir_posix}", file=sys.stderr)
                     last_progress = now
+                    due = True
+        if due:
+            print(f"Progress: {total} entries, current: {dir_posix}", file=sys.stderr)
+
+        return children
+
+    def flush(lines: List[str]) -> None:
+        """Encode buffered rows in one go and append them to the output."""
+        data = "".join(lines).encode("utf-8")
+        lines.clear()
+        with lock:
+            write_all(out_fd, data)
+
+    def walk(stack: List[StackItem], dir_rows: List[DirRow]) -> None:
+        # Explicit pre-order stack; DirEntry.stat reuses what the OS returned
+        # during enumeration. Rows are buffered and written in large batches.
+        lines: List[str] = []
+        add_row = lines.append
+        while stack:
+            stack.extend(visit(stack.pop(), dir_rows, add_row))
+            if len(lines) >= WRITE_BATCH_ROWS:
+                flush(lines)
+        flush(lines)
+
+    def walk_subtree(item: StackItem) -> List[DirRow]:
+        """Thread worker: walk one top-level subtree."""
+        subtree_rows: List[DirRow] = []
+        walk([item], subtree_rows)
+        return subtree_rows
+
+    # Directory rows in pre-order; written after the size roll-up at the end
+    dir_rows: List[DirRow] = []
+
+    # Rows go to a temporary file next to the output that is moved into place
+    # only once the scan succeeds, so a failed scan never leaves a truncated
+    # CSV behind for analyze_disk.py to accept
+    tmp_path = f"{output_csv}.{os.getpid()}.tmp"
+    try:
+        # Unbuffered binary file: rows are formatted by hand (only the path can
+        # need quoting, the other columns are numbers and timestamps, matching
+        # csv.writer output) and written with os.write in ~1 MiB batches
+        with open(tmp_path, "wb", buffering=0) as f:
+            out_fd = f.fileno()
+            write_all(out_fd, (",".join(CSV_COLUMNS) + "\r\n").encode("ascii"))
+            lines: List[str] = []
 
-    except PermissionError as e:
-        print(f"Warning: permission denied: {e}", file=sys.stderr)
-    except OSError as e:
-        print(f"Error: {e}", file=sys.stderr)
-        sys.exit(1)
-
-    # Aggregate directory sizes: for each dir, sum sizes of all files under it
-    dir_sizes = {}
-    for r in rows:
-        if r["is_dir"] == 0:
-            path = r["path"]
-            size = r["size"]
-            parts = path.strip("/").split("/")
-            for i in range(1, len(parts)):
-                parent = "/" + "/".join(parts[:i])
-                dir_sizes[parent] = dir_sizes.get(parent, 0) + size
-    for r in rows:
-        if r["is_dir"] == 1:
-            p = r["path"].rstrip("/")
-            r["size"] = dir_sizes.get(p, 0)
-            r["allocated"] = r["size"]
-
-    # Write CSV
-    fieldnames = ["path", "size", "allocated", "modified", "is_dir", "files_count", "folders_count"]
-    with open(output_csv, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-
-    print(f"Wrote {len(rows)} rows to {output_csv}", file=sys.stderr)
-
-
-def main():
+            try:
+                root_item: StackItem = (root, os.stat(root), None, 0)
+                if threads <= 1:
+                    walk([root_item], dir_rows)
+                else:
+                    # The root is listed here; each top-level subdirectory is then
+                    # walked by a worker. The scan is mostly syscalls (scandir,
+                    # stat), which release the GIL.
+                    top_level = visit(root_item, dir_rows, lines.append)
+                    flush(lines)
+                    with ThreadPoolExecutor(max_workers=threads) as pool:
+                        # Pre-order is kept per subtree, and every subtree's
+                        # parent (the root) precedes it, which the roll-up needs
+                        for subtree_rows in pool.map(walk_subtree, reversed(top_level)):
+                            dir_rows.extend(subtree_rows)
+
+            except PermissionError as e:
+                print(f"Warning: permission denied: {e}", file=sys.stderr)
+            except OSError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
+
+            # Roll directory sizes up and write them in one pass: in reverse
+            # pre-order every directory comes after all of its subdirectories, so
+            # its total is final when reached and can go straight to the output
+            small_ints = SMALL_INTS
+            for path, size, mod_str, files_count, folders_count, parent_row in reversed(dir_rows):
+                if parent_row is not None:
+                    parent_row[1] += size
+                files_text = small_ints[files_count] if files_count < SMALL_INTS_MAX else str(files_count)
+                folders_text = small_ints[folders_count] if folders_count < SMALL_INTS_MAX else str(folders_count)
+                lines.append(f"{csv_field(path)},{size},{size},{mod_str},1,{files_text},{folders_text}\r\n")
+                if len(lines) >= WRITE_BATCH_ROWS:
+                    flush(lines)
+            flush(lines)
+        os.replace(tmp_path, output_csv)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    print(f"Wrote {count} rows to {output_csv}", file=sys.stderr)
+
+
+def main() -> None:
     parser = argparse.ArgumentParser(
         description="Scan directory tree and export to CSV for disk analysis."
     )
@@ -215,6 +384,12 @@ def main():
         help="Exclude paths matching pattern (can be used multiple times). "
              "Supports glob: node_modules, *.log, Library/Caches",
     )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=1,
+        help="Scan top-level subdirectories in N parallel threads (default 1)",
+    )
     args = parser.parse_args()
     scan(
         args.root_path,
@@ -223,6 +398,7 @@ def main():
         args.progress_interval,
         args.max_depth,
         args.exclude_patterns,
+        args.threads,
     )
 
 
@@ -9,12 +9,15 @@ Commands:
     summary                     Show disk usage summary
     largest [--limit N]         Show largest files (default: 20)
     by-type [--limit N]         Show space usage by file type
-    cleanable                   Find potentially cleanable files with reasons
+    cleanable [--jobs N]        Find potentially cleanable files with reasons
     top-folders [--depth N]     Show largest folders at each depth level
     folder <path> [--depth N]   Explore specific folder contents
     search <pattern>            Search files by name pattern
     filter <conditions>         Filter by conditions (see examples)
 
+Options:
+    --cache                     Reuse the parsed table from <csv_path>.cache.pkl across runs
+
 Examples:
     python analyze_disk.py disk.csv summary
     python analyze_disk.py disk.csv largest --limit 50
@@ -29,13 +32,34 @@ CSV Format (WizTree):
 """
 
 import csv
+import fnmatch
+import heapq
+import io
+import itertools
+import os
+import pickle
 import sys
 import re
 import json
-from pathlib import Path, PureWindowsPath
-from collections import defaultdict
-from typing import List, Dict, Any, Tuple
+import operator
+from array import array
+from pathlib import Path
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Dict, Any, Iterator, Optional, Pattern, Tuple
+
+
+# Column layout of a standard WizTree export
+WIZTREE_HEADER = ['File Name', 'Size', 'Allocated', 'Modified', 'Attributes', 'Files', 'Folders']
+
+# Size and count columns are signed 64-bit arrays ('q')
+INT64_LIMIT = 1 << 63
 
+# Bump when the FileTable layout changes so stale --cache files are ignored
+CACHE_VERSION = 1
+
+# Rows per classification task sent to worker processes (cleanable --jobs)
+CLASSIFY_CHUNK_ROWS = 20000
 
 # Cleanable file patterns with reasons and migration info
 # Format: (pattern, category, reason, migration_hint)
@@ -123,9 +147,77 @@ CLEANABLE_PATTERNS = [
     (r'\s*-\s*copy\.(jpg|png|mp4|mkv)$', 'duplicate', 'Possible duplicate (copy)', None),
 ]
 
+MATCH_CONTAINS, MATCH_SUFFIX, MATCH_REGEX = 0, 1, 2
+
+
+def pattern_literal(pattern: str) -> Optional[str]:
+    """Return the text a regex matches if it has no metacharacters, else None."""
+    chars = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == '\\':
+            if i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+                chars.append(pattern[i + 1])
+                i += 2
+                continue
+            return None
+        if c in '.^$*+?{}[]|()':
+            return None
+        chars.append(c)
+        i += 1
+    return ''.join(chars)
+
+
+def compile_pattern(pattern: str) -> Tuple[int, Any]:
+    """Pick the cheapest test for a pattern: substring, suffix or regex."""
+    literal = pattern_literal(pattern)
+    if literal is not None:
+        return MATCH_CONTAINS, literal
+    if pattern.endswith('$') and not pattern.endswith('\\$'):
+        literal = pattern_literal(pattern[:-1])
+        if literal is not None:
+            return MATCH_SUFFIX, literal
+    return MATCH_REGEX, re.compile(pattern)
+
+
+# Paths are lowercased before matching, so patterns are lowercased and
+# compiled once instead of searched with re.IGNORECASE per call. Most are
+# plain substrings (\\node_modules\\) or suffixes (\.tmp$) and are tested
+# with str operations; only the rest keep a regex.
+CLEANABLE_PATTERNS_COMPILED = [
+    (*compile_pattern(pattern.lower()), category, reason, migration_hint)
+    for pattern, category, reason, migration_hint in CLEANABLE_PATTERNS
+]
+
+
+def fuse_patterns(patterns: List[str]) -> Pattern:
+    """One non-capturing alternation that matches wherever any pattern does."""
+    return re.compile('|'.join(f'(?:{pattern})' for pattern in patterns))
+
+
+# All patterns fused into alternations: a path that matches none of them (the
+# common case) is rejected with two C-level searches. Patterns starting with
+# a path separator go in one, so re factors out that shared prefix and only
+# tries the branches at backslashes. The rest are file name patterns: all
+# anchored at the end and unable to match a backslash, so they are searched
+# from the last path component on only; a leading \s* never decides whether
+# a search matches, so it is dropped from them.
+CLEANABLE_DIR_RE = fuse_patterns([
+    pattern.lower() for pattern, _, _, _ in CLEANABLE_PATTERNS if pattern.startswith('\\\\')
+])
+CLEANABLE_NAME_RE = fuse_patterns([
+    re.sub(r'^\\s\*', '', pattern.lower()) for pattern, _, _, _ in CLEANABLE_PATTERNS
+    if not pattern.startswith('\\\\')
+])
+
 
 def parse_size(size_str: str) -> int:
     """Parse size string to bytes."""
+    # Fast path: WizTree writes plain byte counts (isdecimal, unlike isdigit,
+    # only accepts characters int() can parse)
+    if size_str.isdecimal():
+        return int(size_str)
     size_str = size_str.strip().replace(',', '').replace(' ', '')
     if not size_str:
         return 0
@@ -142,7 +234,7 @@ def parse_size(size_str: str) -> int:
         if size_str.upper().endswith(unit):
             try:
                 return int(float(size_str[:-len(unit)]) * multiplier)
-            except ValueError:
+            except (ValueError, OverflowError):
                 return 0
     return 0
 
@@ -158,22 +250,114 @@ def format_size(size_bytes: int) -> str:
 
 def _parse_int(s: str) -> int:
     """Safely parse string to int, returning 0 on failure."""
-    try:
-        return int(s) if s and s.isdigit() else 0
-    except (ValueError, TypeError):
-        return 0
+    return int(s) if s.isdecimal() else 0
 
 
 def get_path_depth(path: str) -> int:
     """Get depth of a path (number of components after drive letter)."""
-    # Normalize path and count parts
-    p = PureWindowsPath(path)
-    parts = p.parts
-    # First part is drive (e.g., 'C:\\'), rest are directories
-    return len(parts) - 1 if parts else 0
+    # One separator per component: C:\ is 0, C:\Users and C:\Users\ are 1
+    path = path.rstrip('\\')
+    depth = path.count('\\')
+    # A UNC root (\\server\share) is one component, like a drive
+    if path.startswith('\\\\'):
+        return max(depth - 3, 0)
+    return depth
+
+
+def push_top(heap: List[Tuple], limit: int, item: Tuple) -> None:
+    """Keep the `limit` largest items seen so far in a bounded min-heap."""
+    if len(heap) < limit:
+        heapq.heappush(heap, item)
+    elif heap and item > heap[0]:
+        heapq.heapreplace(heap, item)
+
+
+def classify_path(path_lower: str) -> Optional[Tuple[str, str, Optional[str]]]:
+    """Return (category, reason, migration_hint) of the first matching pattern."""
+    if not (CLEANABLE_DIR_RE.search(path_lower)
+            or CLEANABLE_NAME_RE.search(path_lower, path_lower.rfind('\\') + 1)):
+        return None
+    # The leftmost match of the alternation is not necessarily the first
+    # pattern in list order, which decides the category
+    for kind, needle, category, reason, migration_hint in CLEANABLE_PATTERNS_COMPILED:
+        if kind == MATCH_CONTAINS:
+            if needle in path_lower:
+                return category, reason, migration_hint
+        elif kind == MATCH_SUFFIX:
+            if path_lower.endswith(needle):
+                return category, reason, migration_hint
+        elif needle.search(path_lower):
+            return category, reason, migration_hint
+    return None
+
+
+class FileTable:
+    """Parsed export as parallel columns, one per field, indexed by row.
+
+    A dict per row costs a few hundred bytes and a hash lookup per field
+    access; here numeric fields are packed into typed arrays. Extensions are
+    few and repeat a lot, so rows store a small int id into ext_names.
+    Lowercased paths are only needed for case-insensitive matching, so that
+    column is built on demand by lower_paths().
+    """
+
+    __slots__ = ('paths', 'paths_lower', 'sizes', 'is_dir', 'depths', 'ext_ids', 'ext_names',
+                 'names', 'files_counts', 'folders_counts')
+
+    def __init__(self) -> None:
+        self.paths: List[str] = []
+        self.paths_lower: Optional[List[str]] = None
+        self.sizes = array('q')
+        self.is_dir = array('b')
+        self.depths = array('l')
+        self.ext_ids = array('l')
+        self.ext_names: List[str] = []  # id -> extension, in first-seen order
+        self.names: List[str] = []
+        self.files_counts = array('q')
+        self.folders_counts = array('q')
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def lower_paths(self) -> List[str]:
+        """Lowercased paths, built on first use and shared by later callers."""
+        if self.paths_lower is None:
+            self.paths_lower = list(map(str.lower, self.paths))
+        return self.paths_lower
 
 
-def read_csv(csv_path: str) -> List[Dict[str, Any]]:
+def classify_paths(paths_lower: List[str]) -> List[Optional[Tuple[str, str, Optional[str]]]]:
+    """Worker entry point: classify_path over a chunk of lowercased paths."""
+    return [classify_path(p) for p in paths_lower]
+
+
+def classify_files(table: FileTable, jobs: int = 1) -> Iterator[Tuple[int, Optional[Tuple]]]:
+    """Yield (row index, classify_path result) for every file row, in row order.
+
+    With jobs > 1 the regex work is spread over worker processes in chunks of
+    CLASSIFY_CHUNK_ROWS; at most 2 * jobs chunks are in flight at a time, so
+    only a bounded copy of the paths is queued for the workers.
+    """
+    paths_lower = table.lower_paths()
+    rows = [i for i, is_dir in enumerate(table.is_dir) if not is_dir]
+    if jobs <= 1:
+        for i in rows:
+            yield i, classify_path(paths_lower[i])
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = deque()
+        for start in range(0, len(rows), CLASSIFY_CHUNK_ROWS):
+            chunk = rows[start:start + CLASSIFY_CHUNK_ROWS]
+            pending.append((chunk, pool.submit(classify_paths, [paths_lower[i] for i in chunk])))
+            if len(pending) >= 2 * jobs:
+                done, future = pending.popleft()
+                yield from zip(done, future.result())
+        while pending:
+            done, future = pending.popleft()
+            yield from zip(done, future.result())
+
+
+def read_csv(csv_path: str, only_dirs: Optional[bool] = None) -> FileTable:
     """Read WizTree CSV file.
 
     WizTree CSV format:
@@ -183,62 +367,156 @@ def read_csv(csv_path: str) -> List[Dict[str, Any]]:
 
     Directory detection: A row is a directory if Files or Folders count > 0,
     or if the path ends with backslash.
+
+    Allocated and Modified are not used by any command and are not kept.
+    With only_dirs=True/False, rows of the other kind are dropped before
+    their size, depth, name and extension are derived.
     """
-    files = []
-    with open(csv_path, 'r', encoding='utf-8-sig', errors='ignore') as f:
+    table = FileTable()
+    # Large binary reads cut syscalls; newline='' leaves line endings to csv
+    raw = open(csv_path, 'rb', buffering=1 << 23)
+    with io.TextIOWrapper(raw, encoding='utf-8-sig', errors='ignore', newline='') as f:
         reader = csv.reader(f)
 
+        # Skip the info and header rows once, up front, instead of testing
+        # every data row for them
+        header: List[str] = []
         for row in reader:
             if not row or len(row) < 2:
                 continue
-
-            # Skip header/info rows
             first_cell = row[0].lower()
-            if first_cell.startswith('generated') or first_cell in ('file name', 'filename', 'name'):
+            if not (first_cell.startswith('generated') or first_cell in ('file name', 'filename', 'name')):
+                break
+            header = row
+        else:
+            return table
+
+        # With the standard header, full-width rows are unpacked in one step;
+        # anything else goes through the per-column length checks
+        full_width = len(WIZTREE_HEADER) if header == WIZTREE_HEADER else -1
+
+        add_path = table.paths.append
+        add_size = table.sizes.append
+        add_is_dir = table.is_dir.append
+        add_depth = table.depths.append
+        add_ext_id = table.ext_ids.append
+        ext_index: Dict[str, int] = {}
+        add_name = table.names.append
+        add_files_count = table.files_counts.append
+        add_folders_count = table.folders_counts.append
+        for row in itertools.chain([row], reader):
+            if len(row) == full_width:
+                path, size_field, _, _, _, files_field, folders_field = row
+            elif len(row) < 2:
                 continue
-
-            try:
-                path = row[0]
-                size = parse_size(row[1]) if len(row) > 1 else 0
-
-                # Directory detection: has Files/Folders count > 0, or path ends with \
-                files_count = _parse_int(row[5]) if len(row) > 5 else 0
-                folders_count = _parse_int(row[6]) if len(row) > 6 else 0
-                is_dir = files_count > 0 or folders_count > 0 or path.endswith('\\')
-
-                entry = {
-                    'path': path,
-                    'size': size,
-                    'allocated': parse_size(row[2]) if len(row) > 2 else 0,
-                    'modified': row[3] if len(row) > 3 else '',
-                    'is_dir': is_dir,
-                    'files_count': files_count,
-                    'folders_count': folders_count,
-                    'depth': get_path_depth(path),
-                }
-                entry['ext'] = Path(path).suffix.lower() if not is_dir else ''
-                entry['name'] = Path(path).name if not path.endswith('\\') else path.rstrip('\\').split('\\')[-1]
-                files.append(entry)
-            except Exception:
+            else:
+                path, size_field = row[0], row[1]
+                files_field = row[5] if len(row) > 5 else ''
+                folders_field = row[6] if len(row) > 6 else ''
+
+            # The helpers below map malformed fields to 0 or '' instead of
+            # raising; values the int64 columns cannot hold are the one
+            # remaining failure, so those rows are skipped explicitly
+
+            # Directory detection: has Files/Folders count > 0, or path ends with \
+            files_count = _parse_int(files_field)
+            folders_count = _parse_int(folders_field)
+            if files_count >= INT64_LIMIT or folders_count >= INT64_LIMIT:
+                continue
+            is_dir = files_count > 0 or folders_count > 0 or path.endswith('\\')
+            if only_dirs is not None and is_dir != only_dirs:
                 continue
+            size = parse_size(size_field)
+            if not -INT64_LIMIT <= size < INT64_LIMIT:
+                continue
+            depth = get_path_depth(path)
+            # Name and extension by plain string slicing (Windows path
+            # rules) rather than building Path objects for every row
+            if path.endswith('\\'):
+                name = path.rstrip('\\').rpartition('\\')[2]
+            else:
+                name = path[path.rfind('\\') + 1:]
+            ext = ''
+            if not is_dir:
+                # Like Path.suffix: a leading or trailing dot is not one
+                dot = name.rfind('.')
+                if 0 < dot < len(name) - 1:
+                    ext = name[dot:].lower()
+
+            add_path(path)
+            add_size(size)
+            add_is_dir(is_dir)
+            add_depth(depth)
+            ext_id = ext_index.get(ext)
+            if ext_id is None:
+                ext_id = ext_index[ext] = len(table.ext_names)
+                table.ext_names.append(ext)
+            add_ext_id(ext_id)
+            add_name(name)
+            add_files_count(files_count)
+            add_folders_count(folders_count)
+
+    return table
+
+
+def read_cached(csv_path: str) -> FileTable:
+    """Like read_csv, but backed by a pickle cache next to the CSV.
+
+    The cache (<csv_path>.cache.pkl) is keyed by the CSV's size and mtime plus
+    CACHE_VERSION, so a rescan invalidates it. The table's columns are flat
+    lists and arrays, so loading them skips CSV parsing and all per-row
+    conversion. On a miss the CSV is parsed in full and the cache is written
+    to a temporary file, then moved into place atomically.
+    """
+    cache_path = csv_path + '.cache.pkl'
+    st = os.stat(csv_path)
+    key = (CACHE_VERSION, st.st_size, st.st_mtime_ns)
+    try:
+        with open(cache_path, 'rb') as f:
+            if pickle.load(f) == key:
+                return pickle.load(f)
+    except Exception:
+        pass
 
-    return files
+    # The cache holds every row, so parse without the only_dirs pushdown
+    table = read_csv(csv_path)
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as out:
+            pickle.dump(key, out, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(table, out, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # Read-only location: just use the freshly parsed table
+        pass
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return table
 
 
-def cmd_summary(files: List[Dict]) -> Dict:
+def cmd_summary(table: FileTable) -> Dict:
     """Generate disk usage summary."""
-    total_size = sum(f['size'] for f in files if not f['is_dir'])
-    total_files = sum(1 for f in files if not f['is_dir'])
-    total_dirs = sum(1 for f in files if f['is_dir'])
-
-    # By extension
-    by_ext = defaultdict(lambda: {'count': 0, 'size': 0})
-    for f in files:
-        if not f['is_dir'] and f['ext']:
-            by_ext[f['ext']]['count'] += 1
-            by_ext[f['ext']]['size'] += f['size']
+    # Totals and per-extension counters (indexed by extension id) in one
+    # pass over the rows
+    ext_names = table.ext_names
+    total_size = total_files = total_dirs = 0
+    ext_count = [0] * len(ext_names)
+    ext_size = [0] * len(ext_names)
+    for size, is_dir, ext_id in zip(table.sizes, table.is_dir, table.ext_ids):
+        if is_dir:
+            total_dirs += 1
+            continue
+        total_size += size
+        total_files += 1
+        ext_count[ext_id] += 1
+        ext_size[ext_id] += size
 
-    top_extensions = sorted(by_ext.items(), key=lambda x: x[1]['size'], reverse=True)[:10]
+    top_extensions = heapq.nlargest(
+        10,
+        (i for i, ext in enumerate(ext_names) if ext and ext_count[i]),
+        key=ext_size.__getitem__
+    )
 
     result = {
         'total_size': format_size(total_size),
@@ -246,8 +524,8 @@ def cmd_summary(files: List[Dict]) -> Dict:
         'total_files': total_files,
         'total_directories': total_dirs,
         'top_extensions': [
-            {'ext': ext, 'count': data['count'], 'size': format_size(data['size'])}
-            for ext, data in top_extensions
+            {'ext': ext_names[i], 'count': ext_count[i], 'size': format_size(ext_size[i])}
+            for i in top_extensions
         ]
     }
 
@@ -255,69 +533,83 @@ def cmd_summary(files: List[Dict]) -> Dict:
     return result
 
 
-def cmd_largest(files: List[Dict], limit: int = 20) -> List[Dict]:
+def cmd_largest(table: FileTable, limit: int = 20) -> List[Dict]:
     """Find largest files."""
-    file_only = [f for f in files if not f['is_dir']]
-    sorted_files = sorted(file_only, key=lambda x: x['size'], reverse=True)[:limit]
+    paths, sizes = table.paths, table.sizes
+    # Top-K selection with a bounded heap instead of sorting every file;
+    # nlargest keeps input order among equal sizes, like a stable sort
+    file_only = (i for i, is_dir in enumerate(table.is_dir) if not is_dir)
+    sorted_files = heapq.nlargest(limit, file_only, key=sizes.__getitem__)
 
     result = [
-        {'path': f['path'], 'size': format_size(f['size']), 'size_bytes': f['size']}
-        for f in sorted_files
+        {'path': paths[i], 'size': format_size(sizes[i]), 'size_bytes': sizes[i]}
+        for i in sorted_files
     ]
 
     print(json.dumps(result, indent=2, ensure_ascii=False))
     return result
 
 
-def cmd_by_type(files: List[Dict], limit: int = 30) -> List[Dict]:
+def cmd_by_type(table: FileTable, limit: int = 30) -> List[Dict]:
     """Show space usage by file type."""
-    by_ext = defaultdict(lambda: {'count': 0, 'size': 0})
+    ext_names = table.ext_names
+    ext_count = [0] * len(ext_names)
+    ext_size = [0] * len(ext_names)
 
-    for f in files:
-        if not f['is_dir']:
-            ext = f['ext'] if f['ext'] else '(no extension)'
-            by_ext[ext]['count'] += 1
-            by_ext[ext]['size'] += f['size']
+    for size, is_dir, ext_id in zip(table.sizes, table.is_dir, table.ext_ids):
+        if not is_dir:
+            ext_count[ext_id] += 1
+            ext_size[ext_id] += size
 
-    sorted_types = sorted(by_ext.items(), key=lambda x: x[1]['size'], reverse=True)[:limit]
+    sorted_types = heapq.nlargest(
+        limit,
+        (i for i in range(len(ext_names)) if ext_count[i]),
+        key=ext_size.__getitem__
+    )
 
     result = [
-        {'extension': ext, 'count': data['count'], 'size': format_size(data['size']), 'size_bytes': data['size']}
-        for ext, data in sorted_types
+        {
+            'extension': ext_names[i] or '(no extension)',
+            'count': ext_count[i],
+            'size': format_size(ext_size[i]),
+            'size_bytes': ext_size[i]
+        }
+        for i in sorted_types
     ]
 
     print(json.dumps(result, indent=2, ensure_ascii=False))
     return result
 
 
-def cmd_top_folders(files: List[Dict], max_depth: int = 2, limit: int = 10) -> Dict:
+def cmd_top_folders(table: FileTable, max_depth: int = 2, limit: int = 10) -> Dict:
     """Show largest folders at each depth level."""
-    # Group directories by depth
+    paths, sizes = table.paths, table.sizes
+    # Group directory rows by depth, keeping only the depths that are shown
     by_depth = defaultdict(list)
-    for f in files:
-        if f['is_dir']:
-            by_depth[f['depth']].append(f)
+    for i, (is_dir, depth) in enumerate(zip(table.is_dir, table.depths)):
+        if is_dir and 1 <= depth <= max_depth:
+            by_depth[depth].append(i)
 
     result = {'depths': {}}
     for depth in range(1, max_depth + 1):
         if depth in by_depth:
-            sorted_dirs = sorted(by_depth[depth], key=lambda x: x['size'], reverse=True)[:limit]
+            sorted_dirs = heapq.nlargest(limit, by_depth[depth], key=sizes.__getitem__)
             result['depths'][depth] = [
                 {
-                    'path': d['path'],
-                    'size': format_size(d['size']),
-                    'size_bytes': d['size'],
-                    'files_count': d.get('files_count', 0),
-                    'folders_count': d.get('folders_count', 0)
+                    'path': paths[i],
+                    'size': format_size(sizes[i]),
+                    'size_bytes': sizes[i],
+                    'files_count': table.files_counts[i],
+                    'folders_count': table.folders_counts[i]
                 }
-                for d in sorted_dirs
+                for i in sorted_dirs
             ]
 
     print(json.dumps(result, indent=2, ensure_ascii=False))
     return result
 
 
-def cmd_folder(files: List[Dict], target_path: str, depth: int = 1) -> Dict:
+def cmd_folder(table: FileTable, target_path: str, depth: int = 1) -> Dict:
     """Explore contents of a specific folder."""
     # Normalize target path
     target = target_path.rstrip('\\').lower() + '\\'
@@ -325,33 +617,36 @@ def cmd_folder(files: List[Dict], target_path: str, depth: int = 1) -> Dict:
 
     # Find direct children and nested items up to specified depth
     children = []
-    for f in files:
-        path_lower = f['path'].lower()
+    paths = table.paths
+    for i, path_lower in enumerate(table.lower_paths()):
         if not path_lower.startswith(target):
             continue
+        path = paths[i]
 
         # Calculate relative depth
-        rel_depth = f['depth'] - target_depth
+        rel_depth = table.depths[i] - target_depth
         if rel_depth < 1 or rel_depth > depth:
             continue
 
         # For depth > 1, only show directories at intermediate levels
-        if rel_depth < depth and not f['is_dir']:
+        is_dir = bool(table.is_dir[i])
+        if rel_depth < depth and not is_dir:
             continue
 
+        size = table.sizes[i]
         children.append({
-            'path': f['path'],
-            'name': f['name'] or f['path'].rstrip('\\').split('\\')[-1],
-            'size': format_size(f['size']),
-            'size_bytes': f['size'],
-            'is_dir': f['is_dir'],
+            'path': path,
+            'name': table.names[i] or path.rstrip('\\').split('\\')[-1],
+            'size': format_size(size),
+            'size_bytes': size,
+            'is_dir': is_dir,
             'depth': rel_depth,
-            'files_count': f.get('files_count', 0),
-            'folders_count': f.get('folders_count', 0)
+            'files_count': table.files_counts[i],
+            'folders_count': table.folders_counts[i]
         })
 
     # Sort by size
-    children = sorted(children, key=lambda x: x['size_bytes'], reverse=True)[:50]
+    children = heapq.nlargest(50, children, key=lambda x: x['size_bytes'])
 
     # Separate dirs and files
     dirs = [c for c in children if c['is_dir']]
@@ -369,10 +664,11 @@ def cmd_folder(files: List[Dict], target_path: str, depth: int = 1) -> Dict:
     return result
 
 
-def cmd_cleanable(files: List[Dict]) -> Dict:
+def cmd_cleanable(table: FileTable, jobs: int = 1) -> Dict:
     """Find potentially cleanable files with reasons and suggestions."""
     cleanable = defaultdict(lambda: {
-        'files': [],
+        'files': [],  # bounded heap of (size, -row)
+        'file_count': 0,
         'total_size': 0,
         'reason': '',
         'migration_hints': set(),
@@ -394,101 +690,93 @@ def cmd_cleanable(files: List[Dict]) -> Dict:
         'duplicate': 'check',
     }
 
-    for f in files:
-        if f['is_dir']:
+    paths = table.paths
+    sizes = table.sizes
+    for i, match in classify_files(table, jobs):
+        if match is None:
             continue
-
-        path_lower = f['path'].lower()
-        for pattern, category, reason, migration_hint in CLEANABLE_PATTERNS:
-            if re.search(pattern, path_lower, re.IGNORECASE):
-                cleanable[category]['files'].append({
-                    'path': f['path'],
-                    'size': format_size(f['size']),
-                    'size_bytes': f['size']
-                })
-                cleanable[category]['total_size'] += f['size']
-                cleanable[category]['reason'] = reason
-                cleanable[category]['safety'] = safety_levels.get(category, 'check')
-                if migration_hint:
-                    cleanable[category]['migration_hints'].add(migration_hint)
-                break
-
-    # Sort files within each category by size
-    for category in cleanable:
-        cleanable[category]['files'] = sorted(
-            cleanable[category]['files'],
-            key=lambda x: x['size_bytes'],
-            reverse=True
-        )[:50]
+        size = sizes[i]
+        category, reason, migration_hint = match
+        # Only the largest files per category are kept, as row numbers, and
+        # formatted once the scan is done; ties go to the earlier row
+        push_top(cleanable[category]['files'], 10, (size, -i))
+        cleanable[category]['file_count'] += 1
+        cleanable[category]['total_size'] += size
+        cleanable[category]['reason'] = reason
+        cleanable[category]['safety'] = safety_levels.get(category, 'check')
+        if migration_hint:
+            cleanable[category]['migration_hints'].add(migration_hint)
+
+    # Category totals and their size order, computed once and shared by
+    # the categories, the safety groups and the grand total
+    totals = {cat: data['total_size'] for cat, data in cleanable.items()}
+    order = sorted(totals, key=totals.__getitem__, reverse=True)
+    total_bytes = sum(totals.values())
 
     # Build result with migration hints
     result = {
-        'categories': {
-            cat: {
-                'reason': data['reason'],
-                'safety': data['safety'],
-                'total_size': format_size(data['total_size']),
-                'total_size_bytes': data['total_size'],
-                'file_count': len(data['files']),
-                'migration_hints': list(data['migration_hints']) if data['migration_hints'] else None,
-                'sample_files': data['files'][:10]
-            }
-            for cat, data in sorted(cleanable.items(), key=lambda x: x[1]['total_size'], reverse=True)
-        },
+        'categories': {},
         'by_safety': {
             'safe': [],
             'check': [],
             'admin': []
         },
-        'total_cleanable_size': format_size(sum(d['total_size'] for d in cleanable.values())),
-        'total_cleanable_bytes': sum(d['total_size'] for d in cleanable.values())
+        'total_cleanable_size': format_size(total_bytes),
+        'total_cleanable_bytes': total_bytes
     }
 
-    # Group by safety level
-    for cat, data in cleanable.items():
-        safety = data['safety']
-        result['by_safety'][safety].append({
+    # Walking categories largest first leaves each safety group sorted by size
+    for cat in order:
+        data = cleanable[cat]
+        total = totals[cat]
+        result['categories'][cat] = {
+            'reason': data['reason'],
+            'safety': data['safety'],
+            'total_size': format_size(total),
+            'total_size_bytes': total,
+            'file_count': data['file_count'],
+            'migration_hints': list(data['migration_hints']) if data['migration_hints'] else None,
+            'sample_files': [
+                {'path': paths[-neg_row], 'size': format_size(size), 'size_bytes': size}
+                for size, neg_row in sorted(data['files'], reverse=True)
+            ]
+        }
+        result['by_safety'][data['safety']].append({
             'category': cat,
-            'size': format_size(data['total_size']),
-            'size_bytes': data['total_size']
+            'size': format_size(total),
+            'size_bytes': total
         })
 
-    # Sort each safety group by size
-    for safety in result['by_safety']:
-        result['by_safety'][safety] = sorted(
-            result['by_safety'][safety],
-            key=lambda x: x['size_bytes'],
-            reverse=True
-        )
-
     print(json.dumps(result, indent=2, ensure_ascii=False))
     return result
 
 
-def cmd_search(files: List[Dict], pattern: str) -> List[Dict]:
+def cmd_search(table: FileTable, pattern: str) -> List[Dict]:
     """Search files by name pattern (supports glob-like wildcards)."""
-    # Convert glob pattern to regex
-    regex_pattern = pattern.replace('.', r'\.').replace('*', '.*').replace('?', '.')
-
-    matches = []
-    for f in files:
-        if re.search(regex_pattern, f['name'], re.IGNORECASE):
-            matches.append({
-                'path': f['path'],
-                'size': format_size(f['size']),
-                'size_bytes': f['size'],
-                'is_dir': f['is_dir']
-            })
-
-    # Sort by size
-    matches = sorted(matches, key=lambda x: x['size_bytes'], reverse=True)[:100]
+    # Glob (*, ?, [...]) anchored to the whole name, compiled once
+    match = re.compile(fnmatch.translate(pattern), re.IGNORECASE).match
+
+    # Largest matches first; nlargest keeps only 100 rows while scanning, so
+    # only those are formatted
+    sizes = table.sizes
+    top = heapq.nlargest(100, (i for i, name in enumerate(table.names) if match(name)),
+                         key=sizes.__getitem__)
+    matches = [
+        {
+            'path': table.paths[i],
+            'size': format_size(sizes[i]),
+            'size_bytes': sizes[i],
+            'is_dir': bool(table.is_dir[i])
+        }
+        for i in top
+    ]
 
     result = {'pattern': pattern, 'matches': matches, 'count': len(matches)}
     print(json.dumps(result, indent=2, ensure_ascii=False))
     return result
 
 
-def cmd_filter(files: List[Dict], conditions: str) -> List[Dict]:
+def cmd_filter(table: FileTable, conditions: str) -> List[Dict]:
     """
     Filter files by conditions.
 
@@ -502,52 +790,66 @@ def cmd_filter(files: List[Dict], conditions: str) -> List[Dict]:
                 return parts[0].strip(), op, parts[1].strip()
         return cond, '=', 'true'
 
-    def matches_condition(f: Dict, field: str, op: str, value: str) -> bool:
-        if field == 'size':
-            file_size = f['size']
-            cmp_size = parse_size(value)
-            if op == '>': return file_size > cmp_size
-            if op == '>=': return file_size >= cmp_size
-            if op == '<': return file_size < cmp_size
-            if op == '<=': return file_size <= cmp_size
-            if op == '=': return file_size == cmp_size
-        elif field == 'ext':
-            file_ext = f['ext'].lower()
+    compare_ops = {
+        '>': operator.gt,
+        '>=': operator.ge,
+        '<': operator.lt,
+        '<=': operator.le,
+        '=': operator.eq,
+    }
+
+    def compile_condition(field: str, op: str, value: str) -> Optional[Callable[[int], bool]]:
+        """Build a predicate on a row index, with the value parsed once.
+
+        None means the condition holds for every row.
+        """
+        if field in ('size', 'depth'):
+            column = table.sizes if field == 'size' else table.depths
+            compare = compare_ops.get(op)
+            if compare is None:
+                return None
+            cmp_value = parse_size(value) if field == 'size' else int(value)
+            return lambda i: compare(column[i], cmp_value)
+        if field == 'ext':
+            # Extensions are stored lowercased
+            ext_ids = table.ext_ids
             cmp_ext = value.lower() if value.startswith('.') else '.' + value.lower()
-            return file_ext == cmp_ext
-        elif field == 'path':
+            if cmp_ext not in table.ext_names:
+                return lambda i: False
+            cmp_id = table.ext_names.index(cmp_ext)
+            return lambda i: ext_ids[i] == cmp_id
+        if field == 'path':
+            column = table.lower_paths()
+            cmp_text = value.lower()
             if op == '~':
-                return value.lower() in f['path'].lower()
-            return f['path'].lower() == value.lower()
-        elif field == 'name':
+                return lambda i: cmp_text in column[i]
+            return lambda i: column[i] == cmp_text
+        if field == 'name':
+            column = table.names
+            cmp_text = value.lower()
             if op == '~':
-                return value.lower() in f['name'].lower()
-            return f['name'].lower() == value.lower()
-        elif field == 'depth':
-            file_depth = f.get('depth', 0)
-            cmp_depth = int(value)
-            if op == '>': return file_depth > cmp_depth
-            if op == '>=': return file_depth >= cmp_depth
-            if op == '<': return file_depth < cmp_depth
-            if op == '<=': return file_depth <= cmp_depth
-            if op == '=': return file_depth == cmp_depth
-        return True
+                return lambda i: cmp_text in column[i].lower()
+            return lambda i: column[i].lower() == cmp_text
+        return None
 
     # Parse all conditions
     cond_list = [parse_condition(c.strip()) for c in conditions.split(',')]
+    predicates = [
+        pred for pred in (compile_condition(field, op, val) for field, op, val in cond_list)
+        if pred is not None
+    ]
 
-    matches = []
-    for f in files:
-        if f['is_dir']:
-            continue
-        if all(matches_condition(f, field, op, val) for field, op, val in cond_list):
-            matches.append({
-                'path': f['path'],
-                'size': format_size(f['size']),
-                'size_bytes': f['size']
-            })
+    # Narrow the file rows one condition at a time; each later condition only
+    # sees the rows that passed the earlier ones
+    rows = [i for i, is_dir in enumerate(table.is_dir) if not is_dir]
+    for pred in predicates:
+        rows = list(filter(pred, rows))
 
-    matches = sorted(matches, key=lambda x: x['size_bytes'], reverse=True)[:100]
+    sizes = table.sizes
+    matches = [
+        {'path': table.paths[i], 'size': format_size(sizes[i]), 'size_bytes': sizes[i]}
+        for i in heapq.nlargest(100, rows, key=sizes.__getitem__)
+    ]
 
     result = {'conditions': conditions, 'matches': matches, 'count': len(matches)}
     print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -574,39 +876,48 @@ def main():
                 return int(sys.argv[idx + 1])
         return default
 
-    files = read_csv(csv_path)
+    if '--cache' in sys.argv:
+        # Every command checks is_dir itself, so the full table serves them all
+        table = read_cached(csv_path)
+    elif command in ('largest', 'by-type', 'cleanable', 'filter'):
+        # File-only commands never look at directory rows
+        table = read_csv(csv_path, only_dirs=False)
+    elif command == 'top-folders':
+        table = read_csv(csv_path, only_dirs=True)
+    else:
+        table = read_csv(csv_path)
 
     if command == 'summary':
-        cmd_summary(files)
+        cmd_summary(table)
     elif command == 'largest':
         limit = get_option('--limit', 20)
-        cmd_largest(files, limit)
+        cmd_largest(table, limit)
     elif command == 'by-type':
         limit = get_option('--limit', 30)
-        cmd_by_type(files, limit)
+        cmd_by_type(table, limit)
     elif command == 'top-folders':
         depth = get_option('--depth', 2)
         limit = get_option('--limit', 10)
-        cmd_top_folders(files, depth, limit)
+        cmd_top_folders(table, depth, limit)
     elif command == 'folder':
         if len(sys.argv) < 4:
             print("Usage: analyze_disk.py <csv> folder <path> [--depth N]", file=sys.stderr)
             sys.exit(1)
         target_path = sys.argv[3]
         depth = get_option('--depth', 1)
-        cmd_folder(files, target_path, depth)
+        cmd_folder(table, target_path, depth)
     elif command == 'cleanable':
-        cmd_cleanable(files)
+        cmd_cleanable(table, get_option('--jobs', 1))
     elif command == 'search':
         if len(sys.argv) < 4:
             print("Usage: analyze_disk.py <csv> search <pattern>", file=sys.stderr)
             sys.exit(1)
-        cmd_search(files, sys.argv[3])
+        cmd_search(table, sys.argv[3])
     elif command == 'filter':
         if len(sys.argv) < 4:
             print("Usage: analyze_disk.py <csv> filter <conditions>", file=sys.stderr)
             sys.exit(1)
-        cmd_filter(files, sys.argv[3])
+        cmd_filter(table, sys.argv[3])
     else:
         print(f"Unknown command: {command}", file=sys.stderr)
         print("Commands: summary, largest, by-type, top-folders, folder, cleanable, search, filter")
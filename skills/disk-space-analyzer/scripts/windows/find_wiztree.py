@@ -11,15 +11,23 @@ Options:
 Returns the path to WizTree executable if found/installed, or exits with error code 1.
 """
 
+import http.client
 import os
+import shutil
 import sys
 import zipfile
+import urllib.error
 import urllib.request
 import tempfile
 from pathlib import Path
 
 WIZTREE_DOWNLOAD_URL = "https://diskanalyzer.com/files/wiztree_4_21_portable.zip"
 WIZTREE_INSTALL_DIR = Path.home() / ".wiztree"
+# Partial downloads are kept here so an interrupted run can resume
+WIZTREE_PARTIAL_ZIP = WIZTREE_INSTALL_DIR / "wiztree_portable.zip.part"
+# ETag or Last-Modified of the response the partial download came from
+WIZTREE_PARTIAL_VALIDATOR = WIZTREE_INSTALL_DIR / "wiztree_portable.zip.part.validator"
+DOWNLOAD_CHUNK_SIZE = 1 << 20
 
 
 def find_wiztree():
@@ -59,6 +67,80 @@ def find_wiztree():
     return None
 
 
+def download_zip(url, part_path, validator_path):
+    """
+    Stream url into part_path, resuming from whatever part_path already holds.
+
+    A resume sends If-Range with the validator saved in validator_path, so
+    if the file changed upstream the server sends all of it again instead
+    of a range to append to the old bytes. Without a saved validator the
+    download starts over.
+    """
+    offset = part_path.stat().st_size if part_path.exists() else 0
+    validator = ""
+    if offset:
+        try:
+            validator = validator_path.read_text().strip()
+        except OSError:
+            pass
+    request = urllib.request.Request(url)
+    if validator:
+        request.add_header("Range", f"bytes={offset}-")
+        request.add_header("If-Range", validator)
+    else:
+        offset = 0
+    try:
+        response = urllib.request.urlopen(request)
+    except urllib.error.HTTPError as e:
+        if e.code == 416 and offset:
+            # Range starts at the end: the previous run got the whole file
+            return
+        raise
+
+    with response:
+        if response.status != 206:
+            # Server ignored the range or the file changed; start over
+            offset = 0
+        # Saved before any body bytes, so an interrupted download can resume.
+        # If-Range only accepts a strong ETag, else Last-Modified
+        etag = response.headers.get("ETag", "")
+        validator = etag if etag and not etag.startswith("W/") else response.headers.get("Last-Modified", "")
+        if validator:
+            validator_path.write_text(validator)
+        else:
+            validator_path.unlink(missing_ok=True)
+        length = response.headers.get("Content-Length")
+        total_size = offset + int(length) if length and length.isdecimal() else 0
+        done = offset
+        with open(part_path, "ab" if offset else "wb") as out:
+            while True:
+                chunk = response.read(DOWNLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                out.write(chunk)
+                done += len(chunk)
+                if total_size > 0:
+                    percent = min(100, done * 100 // total_size)
+                    print(f"\rDownloading: {percent}%", end="", file=sys.stderr)
+        # read(n) returns b"" rather than raising when the connection drops
+        # mid-body, so a short transfer is only visible against Content-Length
+        if done < total_size:
+            raise http.client.IncompleteRead(b"", total_size - done)
+    print(file=sys.stderr)  # New line after progress
+
+
+def verify_zip(zip_path):
+    """Return an error message if zip_path is not a zip or fails its CRC checks, else None."""
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            bad_member = zip_ref.testzip()
+    except zipfile.BadZipFile:
+        return "Error: Downloaded file is not a valid zip"
+    if bad_member is not None:
+        return f"Error: Downloaded zip is corrupt ({bad_member})"
+    return None
+
+
 def download_and_install_wiztree():
     """Download and install WizTree portable version."""
     print(f"Downloading WizTree portable from {WIZTREE_DOWNLOAD_URL}...", file=sys.stderr)
@@ -66,49 +148,55 @@ def download_and_install_wiztree():
     # Create install directory
     WIZTREE_INSTALL_DIR.mkdir(parents=True, exist_ok=True)
 
-    # Download to temp file
-    with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as tmp_file:
-        tmp_path = tmp_file.name
-
     try:
-        # Download with progress
-        def report_progress(block_num, block_size, total_size):
-            if total_size > 0:
-                percent = min(100, block_num * block_size * 100 // total_size)
-                print(f"\rDownloading: {percent}%", end="", file=sys.stderr)
-
-        urllib.request.urlretrieve(WIZTREE_DOWNLOAD_URL, tmp_path, report_progress)
-        print(file=sys.stderr)  # New line after progress
-
-        # Extract zip
-        print(f"Extracting to {WIZTREE_INSTALL_DIR}...", file=sys.stderr)
-        with zipfile.ZipFile(tmp_path, 'r') as zip_ref:
-            zip_ref.extractall(WIZTREE_INSTALL_DIR)
-
-        # Find the executable
-        exe_path = WIZTREE_INSTALL_DIR / "WizTree64.exe"
-        if not exe_path.exists():
-            exe_path = WIZTREE_INSTALL_DIR / "WizTree.exe"
-
-        if exe_path.exists():
-            print(f"WizTree installed successfully: {exe_path}", file=sys.stderr)
-            return str(exe_path)
-        else:
-            print("Error: WizTree executable not found after extraction", file=sys.stderr)
-            return None
-
-    except urllib.error.URLError as e:
+        download_zip(WIZTREE_DOWNLOAD_URL, WIZTREE_PARTIAL_ZIP, WIZTREE_PARTIAL_VALIDATOR)
+    except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+        # Keep the partial file; the next run resumes from it (a connection
+        # dropped mid-body surfaces as http.client.IncompleteRead)
+        print(file=sys.stderr)
         print(f"Download failed: {e}", file=sys.stderr)
         return None
-    except zipfile.BadZipFile:
-        print("Error: Downloaded file is not a valid zip", file=sys.stderr)
+
+    error = verify_zip(WIZTREE_PARTIAL_ZIP)
+    if error:
+        print(error, file=sys.stderr)
+        # A bad file can't be resumed into a good one
+        WIZTREE_PARTIAL_ZIP.unlink()
+        WIZTREE_PARTIAL_VALIDATOR.unlink(missing_ok=True)
+        return None
+
+    # Extract into a scratch directory on the same volume, then move the
+    # files into place, so an interrupted extraction never leaves a
+    # half-written executable behind
+    print(f"Extracting to {WIZTREE_INSTALL_DIR}...", file=sys.stderr)
+    extract_dir = Path(tempfile.mkdtemp(prefix=".extract-", dir=WIZTREE_INSTALL_DIR))
+    try:
+        with zipfile.ZipFile(WIZTREE_PARTIAL_ZIP, 'r') as zip_ref:
+            zip_ref.extractall(extract_dir)
+        for item in extract_dir.iterdir():
+            target = WIZTREE_INSTALL_DIR / item.name
+            if target.is_dir():
+                shutil.rmtree(target)
+            os.replace(item, target)
+    except OSError as e:
+        print(f"Extraction failed: {e}", file=sys.stderr)
         return None
     finally:
-        # Clean up temp file
-        try:
-            os.unlink(tmp_path)
-        except OSError:
-            pass
+        shutil.rmtree(extract_dir, ignore_errors=True)
+    WIZTREE_PARTIAL_ZIP.unlink()
+    WIZTREE_PARTIAL_VALIDATOR.unlink(missing_ok=True)
+
+    # Find the executable
+    exe_path = WIZTREE_INSTALL_DIR / "WizTree64.exe"
+    if not exe_path.exists():
+        exe_path = WIZTREE_INSTALL_DIR / "WizTree.exe"
+
+    if exe_path.exists():
+        print(f"WizTree installed successfully: {exe_path}", file=sys.stderr)
+        return str(exe_path)
+    else:
+        print("Error: WizTree executable not found after extraction", file=sys.stderr)
+        return None
 
 
 def main():
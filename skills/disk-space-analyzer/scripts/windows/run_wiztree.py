@@ -6,7 +6,7 @@ Usage:
     python run_wiztree.py <wiztree_path> <drive> <output_csv> [options]
 
 Options:
-    --timeout N     Maximum wait time in seconds (default: 600 = 10 minutes)
+    --timeout N     Maximum wait time in seconds (default: 600 = 10 minutes); WizTree is stopped after that
 
 Example:
     python run_wiztree.py "C:/Program Files/WizTree/WizTree64.exe" "C:" "./disk_report.csv"
@@ -16,36 +16,600 @@ WizTree runs asynchronously, so this script waits for the process to exit then c
 """
 
 import argparse
+import mmap
+import os
 import subprocess
 import sys
 import time
 from pathlib import Path
 
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
 
-def is_wiztree_running():
-    """Check if any WizTree process is running."""
-    try:
-        result = subprocess.run(
-            ["tasklist", "/FI", "IMAGENAME eq WizTree64.exe"],
-            capture_output=True,
-            text=True,
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    ntdll = ctypes.WinDLL("ntdll")
+    shell32 = ctypes.WinDLL("shell32")
+
+    INVALID_HANDLE_VALUE = wintypes.HANDLE(-1).value
+
+    class JOBOBJECT_ASSOCIATE_COMPLETION_PORT(ctypes.Structure):
+        _fields_ = [
+            ("CompletionKey", ctypes.c_void_p),
+            ("CompletionPort", wintypes.HANDLE),
+        ]
+
+    class JOBOBJECT_BASIC_LIMIT_INFORMATION(ctypes.Structure):
+        _fields_ = [
+            ("PerProcessUserTimeLimit", ctypes.c_int64),
+            ("PerJobUserTimeLimit", ctypes.c_int64),
+            ("LimitFlags", wintypes.DWORD),
+            ("MinimumWorkingSetSize", ctypes.c_size_t),
+            ("MaximumWorkingSetSize", ctypes.c_size_t),
+            ("ActiveProcessLimit", wintypes.DWORD),
+            ("Affinity", ctypes.c_size_t),
+            ("PriorityClass", wintypes.DWORD),
+            ("SchedulingClass", wintypes.DWORD),
+        ]
+
+    class IO_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("ReadOperationCount", ctypes.c_uint64),
+            ("WriteOperationCount", ctypes.c_uint64),
+            ("OtherOperationCount", ctypes.c_uint64),
+            ("ReadTransferCount", ctypes.c_uint64),
+            ("WriteTransferCount", ctypes.c_uint64),
+            ("OtherTransferCount", ctypes.c_uint64),
+        ]
+
+    class JOBOBJECT_EXTENDED_LIMIT_INFORMATION(ctypes.Structure):
+        _fields_ = [
+            ("BasicLimitInformation", JOBOBJECT_BASIC_LIMIT_INFORMATION),
+            ("IoInfo", IO_COUNTERS),
+            ("ProcessMemoryLimit", ctypes.c_size_t),
+            ("JobMemoryLimit", ctypes.c_size_t),
+            ("PeakProcessMemoryUsed", ctypes.c_size_t),
+            ("PeakJobMemoryUsed", ctypes.c_size_t),
+        ]
+
+    class STORAGE_PROPERTY_QUERY(ctypes.Structure):
+        _fields_ = [
+            ("PropertyId", ctypes.c_int),
+            ("QueryType", ctypes.c_int),
+            ("AdditionalParameters", ctypes.c_ubyte * 1),
+        ]
+
+    class DEVICE_SEEK_PENALTY_DESCRIPTOR(ctypes.Structure):
+        _fields_ = [
+            ("Version", wintypes.DWORD),
+            ("Size", wintypes.DWORD),
+            ("IncursSeekPenalty", wintypes.BOOLEAN),
+        ]
+
+    class WIN32_MEMORY_RANGE_ENTRY(ctypes.Structure):
+        _fields_ = [
+            ("VirtualAddress", ctypes.c_void_p),
+            ("NumberOfBytes", ctypes.c_size_t),
+        ]
+
+    class OVERLAPPED(ctypes.Structure):
+        _fields_ = [
+            ("Internal", ctypes.c_size_t),
+            ("InternalHigh", ctypes.c_size_t),
+            ("Offset", wintypes.DWORD),
+            ("OffsetHigh", wintypes.DWORD),
+            ("hEvent", wintypes.HANDLE),
+        ]
+
+    class FILE_NOTIFY_INFORMATION(ctypes.Structure):
+        _fields_ = [
+            ("NextEntryOffset", wintypes.DWORD),
+            ("Action", wintypes.DWORD),
+            ("FileNameLength", wintypes.DWORD),
+        ]
+
+    class PROCESSENTRY32W(ctypes.Structure):
+        _fields_ = [
+            ("dwSize", wintypes.DWORD),
+            ("cntUsage", wintypes.DWORD),
+            ("th32ProcessID", wintypes.DWORD),
+            ("th32DefaultHeapID", ctypes.c_size_t),
+            ("th32ModuleID", wintypes.DWORD),
+            ("cntThreads", wintypes.DWORD),
+            ("th32ParentProcessID", wintypes.DWORD),
+            ("pcPriClassBase", wintypes.LONG),
+            ("dwFlags", wintypes.DWORD),
+            ("szExeFile", wintypes.WCHAR * 260),
+        ]
+
+    kernel32.CreateJobObjectW.argtypes = (ctypes.c_void_p, wintypes.LPCWSTR)
+    kernel32.CreateJobObjectW.restype = wintypes.HANDLE
+    kernel32.CreateIoCompletionPort.argtypes = (wintypes.HANDLE, wintypes.HANDLE, ctypes.c_size_t, wintypes.DWORD)
+    kernel32.CreateIoCompletionPort.restype = wintypes.HANDLE
+    kernel32.SetInformationJobObject.argtypes = (wintypes.HANDLE, ctypes.c_int, ctypes.c_void_p, wintypes.DWORD)
+    kernel32.SetInformationJobObject.restype = wintypes.BOOL
+    kernel32.AssignProcessToJobObject.argtypes = (wintypes.HANDLE, wintypes.HANDLE)
+    kernel32.AssignProcessToJobObject.restype = wintypes.BOOL
+    kernel32.TerminateJobObject.argtypes = (wintypes.HANDLE, wintypes.UINT)
+    kernel32.TerminateJobObject.restype = wintypes.BOOL
+    # Popen closes the main thread handle, so a suspended child is resumed
+    # as a whole process
+    ntdll.NtResumeProcess.argtypes = (wintypes.HANDLE,)
+    ntdll.NtResumeProcess.restype = ctypes.c_long
+    kernel32.GetQueuedCompletionStatus.argtypes = (
+        wintypes.HANDLE,
+        ctypes.POINTER(wintypes.DWORD),
+        ctypes.POINTER(ctypes.c_size_t),
+        ctypes.POINTER(ctypes.c_void_p),
+        wintypes.DWORD,
+    )
+    kernel32.GetQueuedCompletionStatus.restype = wintypes.BOOL
+    kernel32.CreateFileW.argtypes = (
+        wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, ctypes.c_void_p, wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE
+    )
+    kernel32.CreateFileW.restype = wintypes.HANDLE
+    kernel32.ReadDirectoryChangesW.argtypes = (
+        wintypes.HANDLE,
+        ctypes.c_void_p,
+        wintypes.DWORD,
+        wintypes.BOOL,
+        wintypes.DWORD,
+        ctypes.POINTER(wintypes.DWORD),
+        ctypes.POINTER(OVERLAPPED),
+        ctypes.c_void_p,
+    )
+    kernel32.ReadDirectoryChangesW.restype = wintypes.BOOL
+    kernel32.GetDriveTypeW.argtypes = (wintypes.LPCWSTR,)
+    kernel32.GetDriveTypeW.restype = wintypes.UINT
+    kernel32.DeviceIoControl.argtypes = (
+        wintypes.HANDLE,
+        wintypes.DWORD,
+        ctypes.c_void_p,
+        wintypes.DWORD,
+        ctypes.c_void_p,
+        wintypes.DWORD,
+        ctypes.POINTER(wintypes.DWORD),
+        ctypes.c_void_p,
+    )
+    kernel32.DeviceIoControl.restype = wintypes.BOOL
+    kernel32.CancelIoEx.argtypes = (wintypes.HANDLE, ctypes.POINTER(OVERLAPPED))
+    kernel32.CancelIoEx.restype = wintypes.BOOL
+    kernel32.GetOverlappedResult.argtypes = (
+        wintypes.HANDLE, ctypes.POINTER(OVERLAPPED), ctypes.POINTER(wintypes.DWORD), wintypes.BOOL
+    )
+    kernel32.GetOverlappedResult.restype = wintypes.BOOL
+    kernel32.GetCurrentProcess.argtypes = ()
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    kernel32.GetPriorityClass.argtypes = (wintypes.HANDLE,)
+    kernel32.GetPriorityClass.restype = wintypes.DWORD
+    kernel32.SetPriorityClass.argtypes = (wintypes.HANDLE, wintypes.DWORD)
+    kernel32.SetPriorityClass.restype = wintypes.BOOL
+    # Windows 8+
+    if hasattr(kernel32, "PrefetchVirtualMemory"):
+        kernel32.PrefetchVirtualMemory.argtypes = (
+            wintypes.HANDLE, ctypes.c_size_t, ctypes.POINTER(WIN32_MEMORY_RANGE_ENTRY), wintypes.ULONG
+        )
+        kernel32.PrefetchVirtualMemory.restype = wintypes.BOOL
+    kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.TerminateProcess.argtypes = (wintypes.HANDLE, wintypes.UINT)
+    kernel32.TerminateProcess.restype = wintypes.BOOL
+    kernel32.CreateToolhelp32Snapshot.argtypes = (wintypes.DWORD, wintypes.DWORD)
+    kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+    kernel32.Process32FirstW.argtypes = (wintypes.HANDLE, ctypes.POINTER(PROCESSENTRY32W))
+    kernel32.Process32FirstW.restype = wintypes.BOOL
+    kernel32.Process32NextW.argtypes = (wintypes.HANDLE, ctypes.POINTER(PROCESSENTRY32W))
+    kernel32.Process32NextW.restype = wintypes.BOOL
+    kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+    kernel32.CloseHandle.restype = wintypes.BOOL
+    shell32.IsUserAnAdmin.argtypes = ()
+    shell32.IsUserAnAdmin.restype = wintypes.BOOL
+
+JOB_OBJECT_ASSOCIATE_COMPLETION_PORT_INFORMATION = 7
+JOB_OBJECT_EXTENDED_LIMIT_INFORMATION = 9
+JOB_OBJECT_LIMIT_KILL_ON_JOB_CLOSE = 0x2000
+CREATE_SUSPENDED = 0x00000004
+JOB_OBJECT_MSG_ACTIVE_PROCESS_ZERO = 4
+JOB_OBJECT_MSG_NEW_PROCESS = 6
+FILE_LIST_DIRECTORY = 0x0001
+FILE_SHARE_READ_WRITE_DELETE = 0x0007
+OPEN_EXISTING = 3
+FILE_FLAG_BACKUP_SEMANTICS = 0x02000000
+FILE_FLAG_OVERLAPPED = 0x40000000
+# Creation, growth and writes of the watched file
+FILE_NOTIFY_FILTER = 0x0001 | 0x0008 | 0x0010  # FILE_NAME | SIZE | LAST_WRITE
+NOTIFY_BUFFER_SIZE = 64 * 1024
+PROCESS_TERMINATE = 0x0001
+TH32CS_SNAPPROCESS = 0x00000002
+PROCESS_SET_INFORMATION = 0x0200
+# WizTree does the real work, so it runs a notch above normal while this
+# script, which only waits, runs at idle. Above normal rather than high
+# keeps the desktop responsive while WizTree parses the MFT.
+WIZTREE_PRIORITY_CLASS = 0x00008000  # ABOVE_NORMAL_PRIORITY_CLASS
+MONITOR_PRIORITY_CLASS = 0x00000040  # IDLE_PRIORITY_CLASS
+WIZTREE_IMAGE_NAMES = ("wiztree64.exe", "wiztree.exe")
+# Minimum seconds between progress line updates
+PROGRESS_INTERVAL = 0.25
+DRIVE_FIXED = 3
+DRIVE_REMOTE = 4
+IOCTL_STORAGE_QUERY_PROPERTY = 0x002D1400
+STORAGE_DEVICE_SEEK_PENALTY_PROPERTY = 7
+# Seconds between progress checks, by the kind of drive being scanned: an SSD
+# scan can finish in seconds, while a network drive gains nothing from
+# frequent checks
+POLL_INTERVAL_SSD = 0.1
+POLL_INTERVAL_DEFAULT = 1.0
+POLL_INTERVAL_NETWORK = 2.0
+# Shortest process-list poll, used right after the export was seen growing
+POLL_INTERVAL_MIN = 0.05
+
+# Completion keys telling job notifications and directory changes apart
+JOB_COMPLETION_KEY = 1
+DIR_COMPLETION_KEY = 2
+
+# ProcessTree.wait() results; "" means the wait timed out or was not relevant
+WAIT_EXITED = "exited"
+WAIT_CHANGED = "changed"
+
+
+class ProcessTree:
+    """
+    Windows job object that reports when a process and everything it spawned has exited.
+
+    WizTree.exe hands off to WizTree64.exe on 64-bit systems, so waiting on the
+    launched process alone is not enough. The job posts
+    JOB_OBJECT_MSG_ACTIVE_PROCESS_ZERO to a completion port once its last
+    process exits, so waiting costs nothing until something happens.
+    Closing the job (including when this script dies) kills whatever is still
+    running in it, so a timed-out scan never lingers. Directory change
+    notifications for the export file can be routed to the same port with
+    watch(), so one wait covers both progress and exit.
+    """
+
+    def __init__(self):
+        self.dir_handle = None
+        self.job = kernel32.CreateJobObjectW(None, None)
+        if not self.job:
+            raise ctypes.WinError(ctypes.get_last_error())
+        self.port = kernel32.CreateIoCompletionPort(INVALID_HANDLE_VALUE, None, 0, 1)
+        if not self.port:
+            error = ctypes.WinError(ctypes.get_last_error())
+            kernel32.CloseHandle(self.job)
+            raise error
+        info = JOBOBJECT_ASSOCIATE_COMPLETION_PORT(JOB_COMPLETION_KEY, self.port)
+        limits = JOBOBJECT_EXTENDED_LIMIT_INFORMATION()
+        limits.BasicLimitInformation.LimitFlags = JOB_OBJECT_LIMIT_KILL_ON_JOB_CLOSE
+        if not (
+            kernel32.SetInformationJobObject(
+                self.job, JOB_OBJECT_ASSOCIATE_COMPLETION_PORT_INFORMATION, ctypes.byref(info), ctypes.sizeof(info)
+            )
+            and kernel32.SetInformationJobObject(
+                self.job, JOB_OBJECT_EXTENDED_LIMIT_INFORMATION, ctypes.byref(limits), ctypes.sizeof(limits)
+            )
+        ):
+            error = ctypes.WinError(ctypes.get_last_error())
+            self.close()
+            raise error
+
+    def assign(self, proc: subprocess.Popen):
+        """Put a process started with CREATE_SUSPENDED (and so all its future children) in the job."""
+        if not kernel32.AssignProcessToJobObject(self.job, int(proc._handle)):
+            raise ctypes.WinError(ctypes.get_last_error())
+
+    def watch(self, path: str) -> bool:
+        """Also wake wait() when the file at path is created, grows or is written."""
+        directory, name = os.path.split(path)
+        handle = kernel32.CreateFileW(
+            directory,
+            FILE_LIST_DIRECTORY,
+            FILE_SHARE_READ_WRITE_DELETE,
+            None,
+            OPEN_EXISTING,
+            FILE_FLAG_BACKUP_SEMANTICS | FILE_FLAG_OVERLAPPED,
+            None,
         )
-        if "WizTree64.exe" in result.stdout:
+        if handle == INVALID_HANDLE_VALUE:
+            return False
+        if not kernel32.CreateIoCompletionPort(handle, self.port, DIR_COMPLETION_KEY, 0):
+            kernel32.CloseHandle(handle)
+            return False
+        self.dir_handle = handle
+        self.watch_name = name.lower()
+        # Both must outlive the pending read, so they live on the instance
+        self.notify_buffer = ctypes.create_string_buffer(NOTIFY_BUFFER_SIZE)
+        self.overlapped = OVERLAPPED()
+        return self._read_changes()
+
+    @property
+    def watching(self) -> bool:
+        return self.dir_handle is not None
+
+    def _read_changes(self) -> bool:
+        """Queue the next asynchronous directory read; its completion lands on the port."""
+        if kernel32.ReadDirectoryChangesW(
+            self.dir_handle,
+            self.notify_buffer,
+            NOTIFY_BUFFER_SIZE,
+            False,
+            FILE_NOTIFY_FILTER,
+            None,
+            ctypes.byref(self.overlapped),
+            None,
+        ):
             return True
-        result = subprocess.run(
-            ["tasklist", "/FI", "IMAGENAME eq WizTree.exe"],
-            capture_output=True,
-            text=True,
+        self._stop_watching()
+        return False
+
+    def _names_changed(self, size: int) -> bool:
+        """Whether the FILE_NOTIFY_INFORMATION records in the buffer mention the watched file."""
+        offset = 0
+        while offset < size:
+            info = FILE_NOTIFY_INFORMATION.from_buffer(self.notify_buffer, offset)
+            name_offset = offset + ctypes.sizeof(FILE_NOTIFY_INFORMATION)
+            name = self.notify_buffer.raw[name_offset:name_offset + info.FileNameLength].decode("utf-16-le")
+            if name.lower() == self.watch_name:
+                return True
+            if not info.NextEntryOffset:
+                break
+            offset += info.NextEntryOffset
+        return False
+
+    def _stop_watching(self):
+        if self.dir_handle is None:
+            return
+        # Let the kernel finish with the buffer before it can be freed
+        if kernel32.CancelIoEx(self.dir_handle, ctypes.byref(self.overlapped)):
+            transferred = wintypes.DWORD()
+            kernel32.GetOverlappedResult(
+                self.dir_handle, ctypes.byref(self.overlapped), ctypes.byref(transferred), True
+            )
+        kernel32.CloseHandle(self.dir_handle)
+        self.dir_handle = None
+
+    def wait(self, timeout: float) -> str:
+        """Block up to timeout seconds; WAIT_EXITED once no process is left, WAIT_CHANGED on file changes."""
+        code = wintypes.DWORD()
+        key = ctypes.c_size_t()
+        overlapped = ctypes.c_void_p()
+        ok = kernel32.GetQueuedCompletionStatus(
+            self.port, ctypes.byref(code), ctypes.byref(key), ctypes.byref(overlapped), int(timeout * 1000)
         )
-        return "WizTree.exe" in result.stdout
-    except Exception:
+        if not overlapped.value and not ok:
+            return ""  # Timed out
+        if key.value == DIR_COMPLETION_KEY:
+            if not ok:
+                # The directory read failed (e.g. folder removed); stop watching
+                kernel32.CloseHandle(self.dir_handle)
+                self.dir_handle = None
+                return WAIT_CHANGED
+            # Zero bytes means the buffer overflowed and the details were lost
+            changed = code.value == 0 or self._names_changed(code.value)
+            self._read_changes()
+            return WAIT_CHANGED if changed else ""
+        if key.value == JOB_COMPLETION_KEY:
+            if code.value == JOB_OBJECT_MSG_ACTIVE_PROCESS_ZERO:
+                return WAIT_EXITED
+            if code.value == JOB_OBJECT_MSG_NEW_PROCESS:
+                # Children don't inherit a raised priority class (e.g. the
+                # WizTree64.exe that WizTree.exe hands off to); the PID
+                # arrives in place of the OVERLAPPED pointer
+                raise_priority(overlapped.value)
+        return ""
+
+    def terminate(self):
+        """Kill every process in the job."""
+        kernel32.TerminateJobObject(self.job, 1)
+
+    def close(self):
+        self._stop_watching()
+        kernel32.CloseHandle(self.port)
+        kernel32.CloseHandle(self.job)
+
+
+def is_elevated() -> bool:
+    """Whether this process runs with an elevated (administrator) token."""
+    return sys.platform == "win32" and bool(shell32.IsUserAnAdmin())
+
+
+def poll_interval_for(drive: str) -> float:
+    """Pick the progress check interval for a drive such as "C:" from its type and seek penalty."""
+    if sys.platform != "win32":
+        return POLL_INTERVAL_DEFAULT
+    drive_type = kernel32.GetDriveTypeW(drive + "\\")
+    if drive_type == DRIVE_REMOTE:
+        return POLL_INTERVAL_NETWORK
+    if drive_type != DRIVE_FIXED:
+        return POLL_INTERVAL_DEFAULT
+
+    # No access rights are needed to query storage properties
+    handle = kernel32.CreateFileW(
+        "\\\\.\\" + drive, 0, FILE_SHARE_READ_WRITE_DELETE, None, OPEN_EXISTING, 0, None
+    )
+    if handle == INVALID_HANDLE_VALUE:
+        return POLL_INTERVAL_DEFAULT
+    try:
+        query = STORAGE_PROPERTY_QUERY(STORAGE_DEVICE_SEEK_PENALTY_PROPERTY, 0)
+        descriptor = DEVICE_SEEK_PENALTY_DESCRIPTOR()
+        returned = wintypes.DWORD()
+        if not kernel32.DeviceIoControl(
+            handle,
+            IOCTL_STORAGE_QUERY_PROPERTY,
+            ctypes.byref(query),
+            ctypes.sizeof(query),
+            ctypes.byref(descriptor),
+            ctypes.sizeof(descriptor),
+            ctypes.byref(returned),
+            None,
+        ):
+            return POLL_INTERVAL_DEFAULT
+    finally:
+        kernel32.CloseHandle(handle)
+    return POLL_INTERVAL_DEFAULT if descriptor.IncursSeekPenalty else POLL_INTERVAL_SSD
+
+
+def raise_priority(pid: int):
+    """Give a WizTree process WIZTREE_PRIORITY_CLASS, ignoring processes that are already gone."""
+    handle = kernel32.OpenProcess(PROCESS_SET_INFORMATION, False, pid)
+    if handle:
+        kernel32.SetPriorityClass(handle, WIZTREE_PRIORITY_CLASS)
+        kernel32.CloseHandle(handle)
+
+
+def resume_process(proc: subprocess.Popen):
+    """Let a process started with CREATE_SUSPENDED run."""
+    status = ntdll.NtResumeProcess(int(proc._handle))
+    if status != 0:
+        proc.kill()
+        raise OSError(f"Could not resume WizTree (NTSTATUS 0x{status & 0xFFFFFFFF:08X})")
+
+
+def open_process_tree(proc: subprocess.Popen):
+    """Track a suspended proc in a ProcessTree, or return None where job objects are unavailable."""
+    if sys.platform != "win32":
+        return None
+    try:
+        tree = ProcessTree()
+    except OSError:
+        return None
+    try:
+        tree.assign(proc)
+    except OSError:
+        # e.g. already inside a job that does not allow nesting (pre-Windows 8)
+        tree.close()
+        return None
+    return tree
+
+
+def prime_page_cache(path: str):
+    """
+    Ask the OS to keep a finished export in the page cache.
+
+    The analyzer reads the whole CSV right after this script; WizTree just
+    wrote it, so this is normally free and only guards against the pages
+    having been evicted in between. Best effort: any failure is ignored.
+    """
+    try:
+        with open(path, "rb") as f:
+            if sys.platform == "win32":
+                if not hasattr(kernel32, "PrefetchVirtualMemory"):
+                    return
+                # A copy-on-write view is writable, which ctypes needs to take its address
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY) as view:
+                    anchor = ctypes.c_char.from_buffer(view)
+                    entry = WIN32_MEMORY_RANGE_ENTRY(ctypes.addressof(anchor), len(view))
+                    del anchor  # The view can't close while its buffer is exported
+                    kernel32.PrefetchVirtualMemory(kernel32.GetCurrentProcess(), 1, ctypes.byref(entry), 0)
+            elif hasattr(mmap, "MADV_WILLNEED"):
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                    view.madvise(mmap.MADV_WILLNEED)
+    except (OSError, ValueError):
+        pass
+
+
+def start_wiztree(cmd: list):
+    """
+    Launch WizTree and return (proc, ProcessTree or None).
+
+    On Windows the process starts suspended, so it is in the job (and at
+    WIZTREE_PRIORITY_CLASS) before it can start any children.
+    """
+    # Nothing reads WizTree's output; a pipe that fills up would stall it
+    if sys.platform != "win32":
+        return subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL), None
+
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        creationflags=CREATE_SUSPENDED,
+    )
+    tree = open_process_tree(proc)
+    kernel32.SetPriorityClass(int(proc._handle), WIZTREE_PRIORITY_CLASS)
+    try:
+        resume_process(proc)
+    except OSError:
+        if tree is not None:
+            tree.close()
+        raise
+    return proc, tree
+
+
+def find_wiztree_descendants(root_pids: set) -> set:
+    """
+    PIDs of running WizTree processes descended from root_pids (fallback when no ProcessTree is available).
+
+    Toolhelp entries keep the parent PID after the parent exits, so the
+    WizTree64.exe the launcher handed off to is still found through the
+    launcher's PID. WizTree windows the user opened are not descendants and
+    are left alone.
+    """
+    if sys.platform != "win32":
+        return set()
+
+    snapshot = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
+    if snapshot == INVALID_HANDLE_VALUE:
+        return set()
+    processes = []
+    try:
+        entry = PROCESSENTRY32W()
+        entry.dwSize = ctypes.sizeof(entry)
+        found = kernel32.Process32FirstW(snapshot, ctypes.byref(entry))
+        while found:
+            processes.append((entry.th32ProcessID, entry.th32ParentProcessID, entry.szExeFile.lower()))
+            found = kernel32.Process32NextW(snapshot, ctypes.byref(entry))
+    finally:
+        kernel32.CloseHandle(snapshot)
+
+    # The snapshot is in no particular order, so sweep until no new
+    # descendants turn up
+    family = set(root_pids)
+    descendants = set()
+    grown = True
+    while grown:
+        grown = False
+        for pid, parent_pid, _ in processes:
+            if parent_pid in family and pid not in family:
+                family.add(pid)
+                descendants.add(pid)
+                grown = True
+    return {pid for pid, _, exe in processes if pid in descendants and exe in WIZTREE_IMAGE_NAMES}
+
+
+def terminate_processes(pids: set):
+    """Stop the given processes, ignoring any that are already gone."""
+    for pid in pids:
+        handle = kernel32.OpenProcess(PROCESS_TERMINATE, False, pid)
+        if handle:
+            kernel32.TerminateProcess(handle, 1)
+            kernel32.CloseHandle(handle)
+
+
+# Executables already found by _validate_wiztree
+_validated_wiztree_paths = set()
+
+
+def _validate_wiztree(wiztree_path: str) -> bool:
+    """
+    Whether the WizTree executable exists.
+
+    Hits are remembered for callers that scan several drives; misses are
+    not, so WizTree installed later in the same process is picked up.
+    """
+    if wiztree_path in _validated_wiztree_paths:
+        return True
+    if not os.path.isfile(wiztree_path):
         return False
+    _validated_wiztree_paths.add(wiztree_path)
+    return True
 
 
 def run_wiztree(wiztree_path: str, drive: str, output_csv: str, timeout: int = 600):
     """
     Run WizTree export and wait for completion.
 
+    Can be imported and called once per drive to scan several drives from
+    one process.
+
     Args:
         wiztree_path: Path to WizTree executable
         drive: Drive letter (e.g., "C:" or "C")
@@ -55,83 +619,158 @@ def run_wiztree(wiztree_path: str, drive: str, output_csv: str, timeout: int = 6
     Returns:
         True if successful, False otherwise
     """
+    if not _validate_wiztree(wiztree_path):
+        print(f"Error: WizTree not found at {wiztree_path}", file=sys.stderr)
+        return False
+
     # Normalize drive letter
     drive = drive.rstrip(":/\\") + ":"
+    poll_interval = poll_interval_for(drive)
 
     # Resolve output path to absolute
     output_path = Path(output_csv).resolve()
+    # Everything below works on the plain str path; output_path is kept for messages
+    path_str = os.fspath(output_path)
 
     # Ensure output directory exists
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    os.makedirs(os.path.dirname(path_str), exist_ok=True)
 
-    # Remove existing file if present (clean up previous runs)
-    if output_path.exists():
-        print(f"Removing previous report: {output_path}")
-        output_path.unlink()
+    # Empty a previous report in place rather than stat + delete it: WizTree
+    # overwrites the file anyway, and an emptied file still can't pass for a
+    # fresh export if the scan fails
+    try:
+        with open(path_str, "r+b") as previous:
+            print(f"Clearing previous report: {output_path}")
+            previous.truncate()
+    except FileNotFoundError:
+        pass
 
     # Build command
     # WizTree format: WizTree64.exe "C:" /export="output.csv" /admin=0
+    # Use admin mode only when already elevated: it reads the MFT for complete
+    # results without a UAC prompt, and saves a second, elevated run
     cmd = [
         wiztree_path,
         drive,
-        f'/export={output_path}',
-        '/admin=0',  # Don't require admin (may limit some results)
+        f'/export={path_str}',
+        '/admin=1' if is_elevated() else '/admin=0',
     ]
 
-    print(f"Running: {' '.join(cmd)}")
+    # Exactly the command line Popen hands to CreateProcess on Windows
+    print(f"Running: {subprocess.list2cmdline(cmd)}")
 
+    tree = None
+    monitor_priority = 0
     try:
         # Start WizTree process
-        subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
+        proc, tree = start_wiztree(cmd)
+        if sys.platform == "win32":
+            # From here on this process only waits
+            monitor_priority = kernel32.GetPriorityClass(kernel32.GetCurrentProcess())
+            kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), MONITOR_PRIORITY_CLASS)
+        if tree is not None:
+            tree.watch(path_str)
 
         # Wait for WizTree to finish (monitor process, not just file)
-        start_time = time.time()
+        start_time = time.monotonic()
         last_size = -1
+        last_progress = 0.0
+        size_may_have_changed = True
+        sleep_interval = poll_interval
+        # Without a job: the launcher and every WizTree seen under it, so
+        # grandchildren are still traced after their parent exits
+        tracked_pids = {proc.pid}
 
-        while time.time() - start_time < timeout:
-            # Show progress if file exists
-            if output_path.exists():
+        while time.monotonic() - start_time < timeout:
+            # Show progress if file exists; while the directory is watched,
+            # only look again after a change notification for the file
+            if size_may_have_changed:
+                # One stat answers both "does it exist yet" and "how big"
                 try:
-                    current_size = output_path.stat().st_size
-                    if current_size != last_size:
-                        print(f"Exporting... {current_size:,} bytes", end='\r')
-                        last_size = current_size
+                    current_size = os.stat(path_str).st_size
+                except FileNotFoundError:
+                    current_size = last_size  # Not created yet
                 except OSError:
-                    pass  # File might be locked
+                    current_size = last_size  # File might be locked
+                if current_size != last_size:
+                    last_size = current_size
+                    # WizTree exits right after its last write, so check
+                    # back soon
+                    sleep_interval = POLL_INTERVAL_MIN
+                    # Terminal writes are synchronous; a fast-growing export
+                    # shouldn't turn into a flood of them
+                    now = time.monotonic()
+                    if now - last_progress >= PROGRESS_INTERVAL:
+                        sys.stdout.write(f"\rExporting... {current_size:,} bytes")
+                        sys.stdout.flush()
+                        last_progress = now
 
-            # Check if WizTree process has exited
-            if not is_wiztree_running():
+            # Check if WizTree process has exited: sleep in the kernel until the
+            # job empties or the export changes, capped at poll_interval in
+            # case the directory watch is lost
+            if tree is not None:
+                event = tree.wait(poll_interval)
+                if event == WAIT_EXITED:
+                    print()  # New line after progress
+                    break
+                size_may_have_changed = event == WAIT_CHANGED or not tree.watching
+                continue
+            # Without a job, block on the launched process itself while it
+            # runs, then poll for any WizTree it handed off to
+            if proc.poll() is None:
+                try:
+                    proc.wait(poll_interval)
+                except subprocess.TimeoutExpired:
+                    pass
+                continue
+            wiztree_pids = find_wiztree_descendants(tracked_pids)
+            if not wiztree_pids:
                 print()  # New line after progress
                 break
+            tracked_pids |= wiztree_pids
 
-            time.sleep(1)
+            time.sleep(sleep_interval)
+            sleep_interval = min(sleep_interval * 1.5, poll_interval)
         else:
-            # Timeout reached, but still check if file was created
-            print(f"\nTimeout after {timeout} seconds, checking results...")
-
-        # Final check: does the output file exist?
-        if output_path.exists():
-            size = output_path.stat().st_size
-            if size > 0:
-                print(f"Export complete: {output_path} ({size:,} bytes)")
-                return True
+            # Timeout reached: stop the scan so it doesn't keep the disk busy,
+            # and don't trust whatever part of the export was written
+            print(f"\nTimeout after {timeout} seconds, stopping WizTree", file=sys.stderr)
+            if tree is not None:
+                tree.terminate()
             else:
-                print("Error: Output file is empty", file=sys.stderr)
-                return False
-        else:
-            print(f"Error: Output file not created: {output_path}", file=sys.stderr)
+                # The launcher has usually exited by now, handing the scan off
+                # to WizTree64.exe, so stop what it started as well
+                proc.kill()
+                terminate_processes(find_wiztree_descendants(tracked_pids))
             return False
 
+        # Final check: one stat after exit gives the finished size. The last
+        # in-loop reading can predate WizTree's final writes, so it is not reused.
+        try:
+            size = os.stat(path_str).st_size
+        except FileNotFoundError:
+            size = None
+        if size:
+            prime_page_cache(path_str)
+            print(f"Export complete: {output_path} ({size:,} bytes)")
+            return True
+        if size is None:
+            print(f"Error: Output file not created: {output_path}", file=sys.stderr)
+        else:
+            print("Error: Output file is empty", file=sys.stderr)
+        return False
+
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         return False
+    finally:
+        if tree is not None:
+            tree.close()
+        if monitor_priority:
+            kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), monitor_priority)
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description="Run WizTree export and wait for completion."
     )
@@ -144,11 +783,7 @@ def main():
         default=600,
         help="Maximum wait time in seconds (default: 600 = 10 minutes).",
     )
-    args = parser.parse_args()
-
-    if not Path(args.wiztree_path).exists():
-        print(f"Error: WizTree not found at {args.wiztree_path}", file=sys.stderr)
-        sys.exit(1)
+    args = parser.parse_args(argv)
 
     success = run_wiztree(args.wiztree_path, args.drive, args.output_csv, args.timeout)
     sys.exit(0 if success else 1)